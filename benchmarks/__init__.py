@@ -0,0 +1,6 @@
+"""
+Benchmarks of the pyjoycon hot paths, runnable without hardware.
+
+    python -m benchmarks [--json results.json] [--capture session.jcap] [-k name]
+    python -m benchmarks compare before.json after.json
+"""
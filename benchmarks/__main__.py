@@ -0,0 +1,105 @@
+import argparse
+import json
+import sys
+
+from .cases import CASES, simulated_transport, synthetic_reports
+from .harness import environment, measure
+
+
+def run(args):
+    if args.capture:
+        from pyjoycon.capture import CaptureReader, CaptureTransport
+        reader = CaptureReader(args.capture)
+        reports = [bytes(report) for _, report in reader][:args.reports]
+        if not reports:
+            sys.exit(f"{args.capture!r} holds no reports")
+
+        def make_transport():
+            return CaptureTransport(reader, paused=True)
+        source = args.capture
+    else:
+        reports = synthetic_reports(args.reports)
+        make_transport = simulated_transport()
+        source = "synthetic"
+
+    results = {"environment": environment(), "source": source, "cases": {}}
+    print(f"{'case':<22} {'ns/report':>10} {'reports/s':>12} {'peak B':>8} {'retained':>9}")
+    for case in CASES:
+        if args.k and not any(k in case.name for k in args.k):
+            continue
+        result = measure(case, reports, make_transport, args.min_time, args.repeat)
+        results["cases"][case.name] = result
+        print(f"{case.name:<22} {result['ns_per_report']:10.0f} {result['reports_per_second']:12.0f}"
+              f" {result.get('alloc_peak_bytes', 0):8.0f} {result.get('retained_blocks', 0):9.3f}")
+
+    if args.scaling:
+        from .scaling import measure_report_modes, measure_rumble, measure_scaling
+        results["scaling"] = measure_scaling(args.scaling)
+        print(f"\n{'devices':>8} {'mode':>8} {'cpu %/device':>13} {'reports/s/device':>17}")
+        for r in results["scaling"]:
+            print(f"{r['devices']:8} {r['mode']:>8} {r['cpu_per_device'] * 100:13.3f}"
+                  f" {r['reports_per_second_per_device']:17.1f}")
+
+        results["report_modes"] = measure_report_modes(args.scaling)
+        print(f"\n{'report mode':>12} {'cpu %/device':>13} {'reports/s/device':>17} {'bytes/s/device':>15}")
+        for r in results["report_modes"]:
+            print(f"{r['report_mode']:>12} {r['cpu_per_device'] * 100:13.3f}"
+                  f" {r['reports_per_second_per_device']:17.1f} {r['bytes_per_second_per_device']:15.1f}")
+
+        r = results["rumble"] = measure_rumble(args.scaling)
+        print(f"\nrumble on {r['devices']} devices: {r['cpu_per_device'] * 100:.3f} cpu %/device,"
+              f" {r['rumble_reports_per_second_per_device']:.1f} reports/s/device")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)["cases"]
+    with open(args.after) as f:
+        after = json.load(f)["cases"]
+
+    regressions = []
+    print(f"{'case':<22} {'before ns':>10} {'after ns':>10} {'change':>8}")
+    for name in (name for name in before if name in after):
+        old, new = before[name]["ns_per_report"], after[name]["ns_per_report"]
+        change = new / old - 1
+        if change > args.threshold:
+            regressions.append(name)
+        print(f"{name:<22} {old:10.0f} {new:10.0f} {change * 100:+7.1f}%")
+    if regressions:
+        sys.exit(f"slower by more than {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(
+            prog="python -m benchmarks compare",
+            description="compares two result files, fails on regressions")
+        parser.add_argument("before")
+        parser.add_argument("after")
+        parser.add_argument("--threshold", type=float, default=0.1,
+                            help="relative slowdown counted as a regression")
+        compare(parser.parse_args(argv[1:]))
+        return
+
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="measures the per-report cost of the pyjoycon hot paths")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--capture", help="replay the reports of a capture file")
+    parser.add_argument("--reports", type=int, default=600,
+                        help="number of reports to cycle through")
+    parser.add_argument("-k", action="append",
+                        help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scaling", type=float, metavar="SECONDS",
+                        help="also compare reader threads with a JoyConPool, and report modes")
+    run(parser.parse_args(argv))
+
+
+main()
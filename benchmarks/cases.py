@@ -0,0 +1,259 @@
+"""
+The hot paths of pyjoycon, driven by input reports without hardware.
+
+Every case builds its JoyCon with `threaded=False` on a transport from
+`make_transport()`, a SimulatedJoyCon or the replay of a capture, and feeds
+the reports through `JoyCon._handle_report` (dispatch cases) or sets them as
+the current report (getter cases).
+"""
+import time
+
+from pyjoycon import (
+    ButtonEventJoyCon, FusionTrackingJoyCon, GyroTrackingJoyCon, JoyCon, PythonicJoyCon,
+    SimulatedJoyCon,
+)
+from pyjoycon.constants import JOYCON_L_PRODUCT_ID
+from pyjoycon.transport import sine
+
+from .harness import Case
+
+
+def synthetic_reports(n=600, product_id=JOYCON_L_PRODUCT_ID):
+    """
+    returns `n` reports (9 seconds at 66 Hz) of a moving left joycon,
+    with a button pressed or released every ~10 reports.
+    """
+    sim = SimulatedJoyCon(
+        product_id=product_id,
+        buttons=lambda t: (0x400000 if int(t * 6.6) % 2 else 0) | (0x0100 if int(t * 3.3) % 2 else 0),
+        stick_l=lambda t: (2048 + sine(1500, 0.5)(t), 2048 + sine(1500, 0.5, phase=0.25)(t)),
+        imu=lambda t: (
+            sine(300, 1)(t), sine(300, 0.7)(t), 0x1000 + sine(200, 0.3)(t),
+            sine(2000, 0.5)(t), sine(1500, 0.3)(t), sine(1000, 0.2)(t),
+        ),
+    )
+    return sim.make_reports(n)
+
+
+def simulated_transport(product_id=JOYCON_L_PRODUCT_ID):
+    return lambda: SimulatedJoyCon(product_id=product_id)
+
+
+def _joycon(cls, make_transport, **kw):
+    transport = make_transport()
+    return cls(*transport.device_id, transport=transport, threaded=False, **kw)
+
+
+def _getter(cls, read):
+    def setup(reports, make_transport):
+        joycon = _joycon(cls, make_transport)
+
+        def run(report):
+            joycon._input_report = report
+            joycon._report_state = (report, 0, 0.0)
+            read(joycon)
+        return run
+    return setup
+
+
+def _noop_hook(joycon):
+    pass
+
+
+def _dispatch(cls, after=None, hooks=(), hook_options=None, **kw):
+    def setup(reports, make_transport):
+        joycon = _joycon(cls, make_transport, **kw)
+        for hook in hooks:
+            joycon.register_update_hook(hook, **(hook_options or {}))
+        handle = joycon._handle_report
+        clock = time.monotonic
+
+        if after is None:
+            def run(report):
+                handle(report, clock())
+        else:
+            def run(report):
+                handle(report, clock())
+                after(joycon)
+        return run
+    return setup
+
+
+def _read_imu_with_getters(joycon):
+    # the per-axis getters, as the PythonicJoyCon IMU properties used to
+    c = joycon._ime_yz_coeff
+    for i in range(3):
+        (joycon.get_accel_x(i), joycon.get_accel_y(i) * c, joycon.get_accel_z(i) * c)
+        (joycon.get_gyro_x(i), joycon.get_gyro_y(i) * c, joycon.get_gyro_z(i) * c)
+
+
+def _read_imu_properties(joycon):
+    joycon.accel
+    joycon.gyro
+
+
+def _read_all_properties(joycon):
+    joycon.accel_in_g
+    joycon.gyro_in_rad
+    joycon.stick_l
+    joycon.stick_r
+    joycon.battery_level
+    joycon.l, joycon.zl, joycon.minus, joycon.up, joycon.down
+    joycon.left, joycon.right, joycon.capture, joycon.left_sr, joycon.left_sl
+
+
+def _normalize_axis(raw, center, below, above, deadzone=0.1):
+    n = (raw - center) / (above if raw > center else below)
+    if abs(n) <= deadzone:
+        return 0.0
+    return max(-1.0, min(1.0, (n - deadzone if n > 0 else n + deadzone) / (1 - deadzone)))
+
+
+def _normalize_sticks_in_python(joycon):
+    # what a consumer had to do per report before the stick tables
+    (cx, cy), (bx, by), (ax, ay) = joycon._stick_calibration
+    h, v = joycon.stick_l
+    (_normalize_axis(h, cx, bx, ax), _normalize_axis(v, cy, by, ay))
+
+
+def _read_calibrated_sticks(joycon):
+    joycon.stick_l_calibrated
+
+
+def _encode_rumble(reports, make_transport):
+    from pyjoycon.rumble import encode_rumble
+
+    def run(report):
+        # a tone following the timer byte, like a generated waveform
+        encode_rumble(160 + report[1], 0.5, 80 + report[1], 0.25)
+    return run
+
+
+def _read_shared_memory(reports, make_transport):
+    from pyjoycon.shm import SharedStateReader
+    joycon = _joycon(JoyCon, make_transport, shared_memory=True)
+    reader = SharedStateReader(joycon.shared_memory.name)
+    handle = joycon._handle_report
+
+    def run(report):
+        # the report is published by the reader thread, then read by a consumer
+        handle(report, 0.0)
+        reader.read()
+    run.joycon = joycon  # keeps the block alive
+    return run
+
+
+def _status_hook(joycon):
+    joycon.get_status()
+
+
+def _read_state(joycon):
+    state = joycon.get_state()
+    state.buttons, state.stick_l, state.stick_r, state.accel
+
+
+def _drain_events(joycon):
+    for _ in joycon.events():
+        pass
+
+
+CASES = [
+    Case("dispatch_no_hooks", _dispatch(JoyCon),
+         "reader-side cost of one report without hooks"),
+    Case("dispatch_noop_hook", _dispatch(JoyCon, hooks=[_noop_hook]),
+         "reader-side cost of one report with an empty hook"),
+    Case("dispatch_stats", _dispatch(JoyCon, hooks=[_noop_hook], stats=True),
+         "dispatch_noop_hook with JoyCon(stats=True)"),
+    Case("status_hook", _dispatch(JoyCon, hooks=[_status_hook]),
+         "a hook calling get_status() on every report"),
+    Case("status_hook_on_change", _dispatch(
+            JoyCon, hooks=[_status_hook], hook_options={"fields": ("buttons",)}),
+         "the same hook, registered with fields=('buttons',)"),
+    Case("get_status", _getter(JoyCon, JoyCon.get_status),
+         "JoyCon.get_status()"),
+    Case("get_state", _getter(JoyCon, _read_state),
+         "JoyCon.get_state() and its buttons, sticks and accel"),
+    Case("imu_getters", _getter(PythonicJoyCon, _read_imu_with_getters),
+         "all IMU samples through the per-axis getters"),
+    Case("imu_properties", _getter(PythonicJoyCon, _read_imu_properties),
+         "PythonicJoyCon.accel and .gyro"),
+    Case("pythonic_properties", _getter(PythonicJoyCon, _read_all_properties),
+         "IMU, sticks, battery and buttons of PythonicJoyCon"),
+    Case("sticks_python", _getter(PythonicJoyCon, _normalize_sticks_in_python),
+         "normalizing the left stick with deadzone in Python"),
+    Case("sticks_calibrated", _getter(PythonicJoyCon, _read_calibrated_sticks),
+         "PythonicJoyCon.stick_l_calibrated, a table lookup per axis"),
+    Case("rumble_encode", _encode_rumble,
+         "pyjoycon.rumble.encode_rumble of one actuator"),
+    Case("dispatch_shared_memory", _dispatch(JoyCon, hooks=[_noop_hook], shared_memory=True),
+         "dispatch_noop_hook with JoyCon(shared_memory=True)"),
+    Case("shared_memory_read", _read_shared_memory,
+         "publishing a report, and one SharedStateReader.read()"),
+    Case("button_events", _dispatch(ButtonEventJoyCon, _drain_events),
+         "ButtonEventJoyCon hooks, and draining the events"),
+    Case("gyro_tracking", _dispatch(GyroTrackingJoyCon),
+         "GyroTrackingJoyCon._gyro_update_hook"),
+    Case("fusion_tracking", _dispatch(FusionTrackingJoyCon),
+         "FusionTrackingJoyCon, a Madgwick filter step per IMU sample"),
+]
+
+
+def _decode_setup(reports, make_transport):
+    from pyjoycon.decode import decode_reports
+    data = b"".join(reports)
+
+    def run(reports):
+        decode_reports(data)
+    return run
+
+
+def _calibrate_sticks_setup(reports, make_transport):
+    import numpy as np
+    from pyjoycon.decode import calibrate_sticks, decode_reports
+    decoded = decode_reports(b"".join(reports))
+    tables = np.asarray(_joycon(JoyCon, make_transport).get_stick_tables(), dtype=np.float32)
+
+    def run(reports):
+        calibrate_sticks(decoded, tables)
+    return run
+
+
+def _fusion_setup(sessions):
+    def setup(reports, make_transport):
+        import numpy as np
+        from pyjoycon.fusion import madgwick_batch
+
+        # the samples in g and rad/s, as FusionTrackingJoyCon sees them
+        joycon = _joycon(FusionTrackingJoyCon, make_transport)
+        ca, cg = 4.0 / 0x4000, joycon._GYRO_RAD
+        samples = []
+        for report in reports:
+            joycon._input_report = report
+            samples.append([
+                (ax * ca, ay * ca, az * ca, gx * cg, gy * cg, gz * cg)
+                for ax, ay, az, gx, gy, gz in joycon.get_imu_samples()])
+        # sessions of equal length, wrapping around to fill the last one
+        n = -(-len(samples) // sessions)
+        samples = np.resize(np.array(samples), (sessions, n, 3, 6))
+
+        def run(reports):
+            madgwick_batch(samples)
+        return run
+    return setup
+
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    pass
+else:
+    CASES += [
+        Case("decode_bulk", _decode_setup,
+             "pyjoycon.decode.decode_reports over all reports at once", batch=True),
+        Case("calibrate_sticks_bulk", _calibrate_sticks_setup,
+             "pyjoycon.decode.calibrate_sticks over decoded reports", batch=True),
+        Case("fusion_batch", _fusion_setup(1),
+             "pyjoycon.fusion.madgwick_batch over one session", batch=True),
+        Case("fusion_batch_sessions", _fusion_setup(60),
+             "pyjoycon.fusion.madgwick_batch over 60 sessions side by side", batch=True),
+    ]
@@ -0,0 +1,65 @@
+"""
+The time from constructing a JoyCon to its first input report, with and
+without the calibration cache.
+
+By default on a SimulatedJoyCon answering subcommands after `REPLY_DELAY`,
+like a Bluetooth round trip, so it runs anywhere. Pass `--hardware` to
+connect to the JoyCons found instead.
+
+    python -m benchmarks.connect [--hardware]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from pyjoycon import JoyCon, SimulatedJoyCon, get_device_ids
+from pyjoycon.cache import CalibrationCache
+
+# the round trip of a subcommand over Bluetooth, roughly
+REPLY_DELAY = 0.02
+
+
+def time_to_first_report(device_id, cache, make_transport=None):
+    first_report = threading.Event()
+    start = time.perf_counter()
+    transport = make_transport() if make_transport else None
+    joycon = JoyCon(*device_id, calibration_cache=cache, transport=transport)
+    constructed = time.perf_counter() - start
+    joycon.register_update_hook(lambda j: first_report.set())
+    first_report.wait(5)
+    elapsed = time.perf_counter() - start
+    joycon._close()
+    return constructed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.connect", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hardware", action="store_true",
+                        help="connect to the JoyCons found, instead of a simulated one")
+    args = parser.parse_args()
+
+    if args.hardware:
+        ids = get_device_ids()
+        if not ids:
+            sys.exit("no JoyCons connected")
+        make_transport = None
+    else:
+        def make_transport():
+            return SimulatedJoyCon(serial="SIMULATED", reply_delay=REPLY_DELAY)
+        ids = [make_transport().device_id]
+
+    cache = CalibrationCache(os.path.join(tempfile.mkdtemp(), "calibration.json"))
+    for device_id in ids:
+        for name, c in (("no cache", None), ("cold cache", cache), ("warm cache", cache)):
+            constructed, first = time_to_first_report(device_id, c, make_transport)
+            print(f"{device_id[2]!s:<20} {name:<12} constructed {constructed * 1e3:7.1f} ms"
+                  f"   first report {first * 1e3:7.1f} ms")
+            time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
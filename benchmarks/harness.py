@@ -0,0 +1,107 @@
+import gc
+import platform
+import sys
+import time
+import tracemalloc
+
+import pyjoycon
+
+
+class Case:
+    """
+    A benchmark of the per-report cost of one code path.
+
+    `setup(reports, make_transport)` returns a function which is called once
+    per report, or once with all reports if `batch` is set.
+    """
+
+    def __init__(self, name, setup, description="", batch=False):
+        self.name = name
+        self.setup = setup
+        self.description = description
+        self.batch = batch
+
+
+def _time_once(func, reports, loops, batch):
+    start = time.perf_counter()
+    for _ in range(loops):
+        if batch:
+            func(reports)
+        else:
+            for report in reports:
+                func(report)
+    return time.perf_counter() - start
+
+
+def measure(case, reports, make_transport, min_time=0.2, repeat=5) -> dict:
+    """
+    returns the per-report cost of `case` over `reports`:
+
+        ns_per_report      : best of `repeat` runs of at least `min_time`
+        reports_per_second : on one core, 1e9 / ns_per_report
+        alloc_peak_bytes   : most memory allocated at once while handling
+                             a single report (tracemalloc), for batch cases
+                             the peak of the batch divided by its size
+        retained_blocks    : memory blocks still alive per handled report,
+                             should be ~0
+    """
+    func = case.setup(reports, make_transport)
+    batch = case.batch
+
+    # warm up and calibrate the number of loops per run
+    loops = 1
+    while _time_once(func, reports, loops, batch) < min_time:
+        loops *= 2
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = min(_time_once(func, reports, loops, batch) for _ in range(repeat))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    ns_per_report = best / (loops * len(reports)) * 1e9
+
+    if not hasattr(tracemalloc, "reset_peak"):  # python < 3.9
+        return {
+            "ns_per_report": ns_per_report,
+            "reports_per_second": 1e9 / ns_per_report,
+        }
+
+    tracemalloc.start()
+    try:
+        calls = [reports] if batch else reports
+        func(calls[0])
+        before = tracemalloc.take_snapshot()
+        peak = 0
+        for arg in calls:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func(arg)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+        if batch:
+            peak /= len(reports)
+    finally:
+        tracemalloc.stop()
+    retained = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename")
+        if stat.traceback[0].filename != tracemalloc.__file__)
+
+    return {
+        "ns_per_report": ns_per_report,
+        "reports_per_second": 1e9 / ns_per_report,
+        "alloc_peak_bytes": peak,
+        "retained_blocks": retained / len(reports),
+    }
+
+
+def environment() -> dict:
+    return {
+        "pyjoycon": pyjoycon.__version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
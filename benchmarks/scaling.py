@@ -0,0 +1,110 @@
+"""
+The CPU time per device of one reader thread per JoyCon against a
+JoyConPool, for a growing number of simulated devices streaming at ~66 Hz,
+the CPU time and bytes on air per device of each input report mode, and
+the CPU time per device of playing rumble waveforms on all of them.
+"""
+import time
+
+from pyjoycon import JoyCon, JoyConPool, SimulatedJoyCon
+
+DEVICE_COUNTS = (1, 4, 16, 32, 64)
+
+REPORT_MODES = {
+    "full": {},
+    "imu_off": {"imu": False},
+    "simple": {"simple_mode": True},
+}
+
+
+def _buttons(t):
+    # a button pressed for 0.25 s every 0.5 s
+    return 0x08 if t % 0.5 < 0.25 else 0
+
+
+def _run(n, seconds, pooled, **kw):
+    pool = JoyConPool() if pooled else None
+    joycons = []
+    sims = []
+    for _ in range(n):
+        sim = SimulatedJoyCon(buttons=_buttons)
+        sims.append(sim)
+        if pooled:
+            joycons.append(pool.open(*sim.device_id, transport=sim, **kw))
+        else:
+            joycons.append(JoyCon(*sim.device_id, transport=sim, **kw))
+    sent = sum(sim.bytes_sent for sim in sims)
+
+    counted = [0]
+    for joycon in joycons:
+        joycon.register_update_hook(lambda j: counted.__setitem__(0, counted[0] + 1))
+
+    start_cpu, start = time.process_time(), time.monotonic()
+    time.sleep(seconds)
+    cpu, wall = time.process_time() - start_cpu, time.monotonic() - start
+    sent = sum(sim.bytes_sent for sim in sims) - sent
+
+    for joycon in joycons:
+        joycon._close()
+    if pool:
+        pool.close()
+    return {
+        "devices": n,
+        "mode": "pool" if pooled else "threads",
+        "cpu_per_device": cpu / wall / n,
+        "reports_per_second_per_device": counted[0] / wall / n,
+        "bytes_per_second_per_device": sent / wall / n,
+    }
+
+
+def measure_scaling(seconds=2.0, counts=DEVICE_COUNTS) -> list:
+    """returns a result dict per device count and reader mode"""
+    results = []
+    for n in counts:
+        for pooled in (False, True):
+            results.append(_run(n, seconds, pooled))
+            # let the daemon threads of the previous run die off
+            time.sleep(0.1)
+    return results
+
+
+def measure_report_modes(seconds=2.0, devices=16) -> list:
+    """returns a result dict per report mode, for `devices` pooled JoyCons"""
+    results = []
+    for mode, kw in REPORT_MODES.items():
+        result = _run(devices, seconds, True, **kw)
+        result["report_mode"] = mode
+        results.append(result)
+        time.sleep(0.1)
+    return results
+
+
+def measure_rumble(seconds=2.0, devices=64) -> dict:
+    """returns the CPU time per device of a RumbleScheduler playing on `devices` JoyCons"""
+    from pyjoycon.rumble import RumbleScheduler, encode_waveform
+
+    # a 0.5 s tone rising in pitch, with a pause
+    wave = encode_waveform(
+        [(160 + 20 * i, 0.6, 80 + 10 * i, 0.4) for i in range(24)] + [None] * 10)
+    joycons = []
+    for _ in range(devices):
+        sim = SimulatedJoyCon()
+        joycons.append(JoyCon(*sim.device_id, transport=sim, threaded=False))
+    scheduler = RumbleScheduler()
+    for i, joycon in enumerate(joycons):
+        # staggered, so the reports don't all change in the same frame
+        scheduler.play(joycon, wave[i % len(wave):] + wave[:i % len(wave)], loop=True)
+
+    start_cpu, start = time.process_time(), time.monotonic()
+    sent = scheduler.reports_sent
+    time.sleep(seconds)
+    cpu, wall = time.process_time() - start_cpu, time.monotonic() - start
+    sent = scheduler.reports_sent - sent
+    scheduler.close()
+    for joycon in joycons:
+        joycon._close()
+    return {
+        "devices": devices,
+        "cpu_per_device": cpu / wall / devices,
+        "rumble_reports_per_second_per_device": sent / wall / devices,
+    }
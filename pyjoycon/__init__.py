@@ -1,20 +1,41 @@
 from .joycon import JoyCon
+from .state import JoyConState
 from .wrappers import PythonicJoyCon  # as JoyCon
 from .gyro import GyroTrackingJoyCon
-from .event import ButtonEventJoyCon
+from .fusion import FusionTrackingJoyCon
+from .event import ButtonEventJoyCon, ButtonEvent
+from .eventqueue import EventQueue
+from .aio import AsyncJoyCon
+from .pool import JoyConPool
+from .pair import JoyConPair, JoyConPairState
+from .rumble import RumbleScheduler
+from .transport import SimulatedJoyCon
 from .device import get_device_ids, get_ids_of_type
 from .device import is_id_L
 from .device import get_R_ids, get_L_ids
 from .device import get_R_id, get_L_id
+from .device import connect_all, DeviceMonitor
 
 
 __version__ = "0.2.4"
 
 __all__ = [
+    "AsyncJoyCon",
+    "ButtonEvent",
     "ButtonEventJoyCon",
+    "DeviceMonitor",
+    "EventQueue",
+    "FusionTrackingJoyCon",
     "GyroTrackingJoyCon",
     "JoyCon",
+    "JoyConPair",
+    "JoyConPairState",
+    "JoyConPool",
+    "JoyConState",
     "PythonicJoyCon",
+    "RumbleScheduler",
+    "SimulatedJoyCon",
+    "connect_all",
     "get_L_id",
     "get_L_ids",
     "get_R_id",
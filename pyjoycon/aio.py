@@ -0,0 +1,155 @@
+import asyncio
+import collections
+import threading
+import weakref
+
+# default time the event loop may batch wakeups for, in seconds
+BATCH_INTERVAL = 0.004
+
+
+class _LoopWaker:
+    """
+    Wakes one event loop on behalf of every AsyncJoyCon living on it.
+
+    Reader threads only mark their AsyncJoyCon as pending. The loop is woken
+    at most once per `interval`, and then services every pending AsyncJoyCon
+    in one go, instead of once per report per device.
+    """
+
+    def __init__(self, loop, interval):
+        self._loop = loop
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._scheduled = False
+        self._last_run = 0.0
+
+    def wake(self, target):  # reader thread
+        with self._lock:
+            self._pending.add(target)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._defer)
+        except RuntimeError:  # the loop is closed
+            pass
+
+    def _defer(self):  # event loop
+        delay = self._last_run + self._interval - self._loop.time()
+        if delay > 0:
+            self._loop.call_later(delay, self._run)
+        else:
+            self._run()
+
+    def _run(self):  # event loop
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._scheduled = False
+        self._last_run = self._loop.time()
+        for target in pending:
+            target._on_wakeup()
+
+
+_wakers = weakref.WeakKeyDictionary()
+
+
+def _get_waker(loop, interval):
+    waker = _wakers.get(loop)
+    if waker is None:
+        waker = _wakers[loop] = _LoopWaker(loop, interval)
+    else:
+        waker._interval = min(waker._interval, interval)
+    return waker
+
+
+class AsyncJoyCon:
+    """
+    An asyncio interface to a running JoyCon.
+
+        joycon = AsyncJoyCon(ButtonEventJoyCon(*get_R_id()))
+        async for seq, timestamp, report in joycon.reports():
+            ...
+
+    Input reports are buffered on the reader thread, up to `maxsize`, and
+    handed to the event loop in batches of at most one wakeup per
+    `batch_interval` seconds, shared by all AsyncJoyCons on the same loop.
+    Create it in a coroutine on its loop, or pass the `loop` to use.
+    """
+
+    def __init__(self, joycon, maxsize=256, batch_interval=BATCH_INTERVAL, loop=None):
+        self.joycon = joycon
+        self.dropped = 0  # reports which did not fit in the buffer
+        self._loop = loop or asyncio.get_running_loop()
+        self._waker = _get_waker(self._loop, batch_interval)
+        self._reports = collections.deque(maxlen=maxsize)
+        self._events = collections.deque()
+        self._waiters = []
+        self._has_events = hasattr(joycon, "events")
+        joycon.register_update_hook(self._update_hook)
+
+    def close(self):
+        self.joycon.unregister_update_hook(self._update_hook)
+
+    def _update_hook(self, joycon):  # reader thread
+        reports = self._reports
+        if len(reports) == reports.maxlen:
+            self.dropped += 1
+        reports.append((joycon._report_seq, joycon._report_time, joycon._input_report))
+        self._waker.wake(self)
+
+    def _on_wakeup(self):  # event loop
+        if self._has_events:
+            self._events.extend(self.joycon.events())
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _wait(self):
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        await waiter
+
+    async def reports(self):
+        """yields tuples like `(seq, timestamp, report)` for every input report"""
+        while True:
+            while self._reports:
+                yield self._reports.popleft()
+            await self._wait()
+
+    async def next_report(self):
+        """returns the next tuple like `(seq, timestamp, report)`"""
+        while not self._reports:
+            await self._wait()
+        return self._reports.popleft()
+
+    async def next_event(self):
+        """returns the next `(button, state)` event of a ButtonEventJoyCon"""
+        if not self._has_events:
+            raise TypeError(f"{type(self.joycon).__name__} does not produce events")
+        while not self._events:
+            await self._wait()
+        return self._events.popleft()
+
+    async def _reply(self, future):
+        # subcommands are queued right away, the reader routes their replies
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future, loop=self._loop),
+            self.joycon._SUBCMD_TIMEOUT)
+
+    async def spi_flash_read(self, address, size) -> bytes:
+        return await self._reply(self.joycon._spi_flash_read_future(address, size))
+
+    async def set_player_lamp_on(self, on_pattern: int):
+        await self._reply(self.joycon.set_player_lamp_on(on_pattern))
+
+    async def set_player_lamp_flashing(self, flashing_pattern: int):
+        await self._reply(self.joycon.set_player_lamp_flashing(flashing_pattern))
+
+    async def set_player_lamp(self, pattern: int):
+        await self._reply(self.joycon.set_player_lamp(pattern))
+
+    async def disconnect_device(self):
+        """returns once the disconnect request is written"""
+        await self._reply(self.joycon.disconnect_device())
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from typing import Optional
+
+# bump when the layout of the cached data changes, older entries are dropped
+CACHE_VERSION = 2
+
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "pyjoycon", "calibration.json")
+
+
+class CalibrationCache:
+    """
+    An on-disk cache of the data `JoyCon` reads from SPI flash when it
+    connects (colors and calibration), keyed by serial number.
+
+    The cache is a single JSON file holding the raw SPI bytes, so a cached
+    JoyCon decodes them exactly like a freshly read one. A JoyCon connected
+    from the cache re-reads the flash in the background once it is running,
+    and replaces the entry if it no longer matches.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or default_cache_path()
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def get(self, serial: str) -> Optional[dict]:
+        """returns the cached SPI data of `serial` as a dict of bytes, or None"""
+        if not serial:
+            return None
+        with self._lock:
+            entry = self._load().get(serial)
+        if not entry or entry.get("version") != CACHE_VERSION:
+            return None
+        return {k: bytes.fromhex(v) for k, v in entry["data"].items()}
+
+    def put(self, serial: str, data: dict):
+        if not serial:
+            return
+        with self._lock:
+            self._load()[serial] = {
+                "version": CACHE_VERSION,
+                "data": {k: v.hex() for k, v in data.items()},
+            }
+            self._save()
+
+    def invalidate(self, serial: str = None):
+        """drops the entry of `serial`, or every entry"""
+        with self._lock:
+            entries = self._load()
+            if serial is None:
+                entries.clear()
+            else:
+                entries.pop(serial, None)
+            self._save()
@@ -0,0 +1,304 @@
+"""
+Recording of the input report stream of a JoyCon, and its replay.
+
+A capture file is a fixed header, a JSON metadata block and fixed size
+records, so record `i` lives at `data_offset + i * RECORD_SIZE`:
+
+    header   : magic, version, record size, metadata size
+    metadata : JSON with the device ids, colors and raw calibration data,
+               padded to a multiple of RECORD_SIZE
+    records  : host timestamp (float64), 49 byte input report, padding
+"""
+import bisect
+import collections
+import json
+import mmap
+import struct
+import threading
+import time
+
+from .joycon import JoyCon
+from .transport import Transport
+from . import stick
+
+MAGIC = b"PYJOYCAP"
+VERSION = 1
+RECORD_SIZE = 64
+
+_HEADER = struct.Struct("<8sHHI")
+_RECORD = struct.Struct(f"<d{JoyCon._INPUT_REPORT_SIZE}s")
+
+# where JoyCon._read_spi_calibration_data finds each part of its data,
+# the stick calibration at the factory address of either side
+_SPI_ADDRESSES = {
+    "color": (0x6050,),
+    "imu_cal": (0x6020,),
+    "stick_cal": (stick.FACTORY_STICK_CAL_L, stick.FACTORY_STICK_CAL_R),
+}
+
+
+class CaptureWriter:
+    """
+    Records every input report of a running JoyCon into a capture file.
+
+        with CaptureWriter("session.jcap", joycon):
+            time.sleep(60)
+    """
+
+    def __init__(self, path: str, joycon):
+        self.path = path
+        self.joycon = joycon
+        self.records = 0
+        self._file = open(path, "wb")
+        self._record = bytearray(RECORD_SIZE)
+        self._lock = threading.Lock()  # so close() doesn't pull the file from under the hook
+
+        metadata = json.dumps({
+            "vendor_id": joycon.vendor_id,
+            "product_id": joycon.product_id,
+            "serial": joycon.serial,
+            "color_body": joycon.color_body,
+            "color_btn": joycon.color_btn,
+            "calibration": {
+                k: v.hex() for k, v in joycon._calibration_data.items()},
+            "start_time": time.time(),
+        }).encode()
+        padding = -(_HEADER.size + len(metadata)) % RECORD_SIZE
+        metadata += b" " * padding
+        self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, len(metadata)))
+        self._file.write(metadata)
+
+        joycon.register_update_hook(self._update_hook)
+
+    def _update_hook(self, joycon):  # reader thread
+        with self._lock:
+            if self._file.closed:
+                return  # closed while this report was dispatched
+            _RECORD.pack_into(self._record, 0, joycon._report_time, joycon._input_report)
+            self._file.write(self._record)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self.joycon.unregister_update_hook(self._update_hook)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """
+    Memory maps a capture file, so opening it costs the same for any size.
+
+    `reader[i]` returns `(timestamp, report)`, where report is a zero-copy
+    memoryview of the 49 byte input report. Records and arrays may outlive
+    `close()`, the file stays mapped until the last of them is gone. `index_of(timestamp)` seeks by
+    time with a binary search over the fixed size records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, record_size, metadata_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path!r} is not a capture file")
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path!r} has an unsupported capture version")
+
+        self.data_offset = _HEADER.size + metadata_size
+        self.metadata = json.loads(
+            bytes(self._view[_HEADER.size:self.data_offset]).decode())
+        # a record cut short by a crash is ignored
+        self._length = (len(self._mmap) - self.data_offset) // RECORD_SIZE
+
+    @property
+    def device_id(self):
+        """returns a tuple like `(vendor_id, product_id, serial_number)`"""
+        m = self.metadata
+        return m["vendor_id"], m["product_id"], m["serial"]
+
+    @property
+    def calibration_data(self) -> dict:
+        return {k: bytes.fromhex(v) for k, v in self.metadata["calibration"].items()}
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("record index out of range")
+        offset = self.data_offset + i * RECORD_SIZE
+        timestamp, = struct.unpack_from("<d", self._mmap, offset)
+        return timestamp, self._view[offset + 8:offset + _RECORD.size]
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def timestamp(self, i) -> float:
+        return struct.unpack_from("<d", self._mmap, self.data_offset + i * RECORD_SIZE)[0]
+
+    def index_of(self, timestamp: float) -> int:
+        """returns the index of the first record at or after `timestamp`"""
+        return bisect.bisect_left(_Timestamps(self), timestamp)
+
+    def as_array(self):
+        """returns the records as a numpy structured array, without copying"""
+        import numpy as np
+        dtype = np.dtype({
+            "names": ["timestamp", "report"],
+            "formats": ["<f8", ("u1", JoyCon._INPUT_REPORT_SIZE)],
+            "offsets": [0, 8],
+            "itemsize": RECORD_SIZE,
+        })
+        return np.frombuffer(
+            self._mmap, dtype=dtype, count=self._length, offset=self.data_offset)
+
+    def close(self):
+        if self._mmap is None:
+            return
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass  # records are still in use, the mmap is unmapped with the last one
+        self._view = self._mmap = None
+        self._file.close()
+
+
+class _Timestamps:
+    # a lazy sequence of record timestamps, for bisect
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __len__(self):
+        return len(self._reader)
+
+    def __getitem__(self, i):
+        return self._reader.timestamp(i)
+
+
+class CaptureTransport(Transport):
+    """
+    Plays a capture back like a connected JoyCon would.
+
+    Pass it as the `transport` of a JoyCon, which then runs its usual
+    connect, hook and event machinery on the recorded reports:
+
+        joycon = PythonicJoyCon(*reader.device_id, transport=CaptureTransport(reader))
+
+    SPI reads are answered from the recorded calibration data. Reports are
+    played back at `speed` times the recorded rate, or as fast as they can
+    be read if `speed` is None. `finished` is set once the capture ran out.
+    With `paused`, playback waits for `resume()`, so hooks can be registered
+    before the first report.
+    """
+
+    def __init__(self, reader: CaptureReader, speed: float = 1.0, start: int = 0,
+                 paused=False):
+        self.reader = reader
+        self.speed = speed
+        self.position = start
+        self.finished = threading.Event()
+        self._playing = threading.Event()
+        if not paused:
+            self._playing.set()
+        self.nonblocking = False
+        self._replies = collections.deque()
+        self._streaming = False
+        self._clock_start = None
+        self._flash = {}
+        for name, data in reader.calibration_data.items():
+            for address in _SPI_ADDRESSES.get(name, ()):
+                self._flash[address] = data
+
+    @property
+    def device_id(self):
+        """returns a tuple like `(vendor_id, product_id, serial_number)`"""
+        return self.reader.device_id
+
+    def resume(self):
+        self._playing.set()
+
+    def set_nonblocking(self, nonblocking):
+        self.nonblocking = bool(nonblocking)
+
+    def write(self, data):
+        data = bytes(data)
+        if data[0] != 0x01:
+            return
+        subcommand, argument = data[10], data[11:]
+        reply = bytearray(JoyCon._INPUT_REPORT_SIZE)
+        reply[0] = 0x21
+        reply[13] = 0x80
+        reply[14] = subcommand
+        if subcommand == 0x10:  # SPI flash read
+            address = int.from_bytes(argument[:4], "little")
+            size = argument[4]
+            chunk = self._flash.get(address, b"\xff" * size)[:size]
+            reply[13] = 0x90
+            reply[15:20] = argument[:5]
+            reply[20:20 + len(chunk)] = chunk
+        elif subcommand == 0x03:  # set input report mode
+            self._streaming = True
+        self._replies.append(bytes(reply))
+
+    def _next_report(self):
+        reader = self.reader
+        if self.position >= len(reader):
+            self.finished.set()
+            return None
+        timestamp, report = reader[self.position]
+        if self.speed:
+            if self._clock_start is None:
+                self._clock_start = (time.monotonic(), timestamp)
+            host_start, capture_start = self._clock_start
+            delay = host_start + (timestamp - capture_start) / self.speed - time.monotonic()
+            if delay > 0:
+                if self.nonblocking:
+                    return b""
+                time.sleep(delay)
+        self.position += 1
+        return bytes(report)
+
+    def read(self, size, timeout_ms=None):
+        if self._replies:
+            return self._replies.popleft()
+        if self._streaming and self._playing.is_set():
+            report = self._next_report()
+            if report is not None:
+                return report
+        if not self.nonblocking:
+            time.sleep(0.01)  # nothing to read, don't let the reader spin
+        return b""
+
+    def close(self):
+        self.finished.set()
+
+
+def replay(path: str, cls=JoyCon, speed: float = 1.0, paused=False, **kw):
+    """
+    returns a JoyCon of class `cls` playing back the capture at `path`
+
+    Playback starts once the JoyCon is constructed, so the hooks of `cls`
+    see every report. With `paused`, it waits for `resume()` on the
+    CaptureTransport, `joycon._joycon_device`, to register more hooks first.
+    Wait for its `finished` event to know when playback is done.
+    """
+    reader = CaptureReader(path)
+    transport = CaptureTransport(reader, speed, paused=True)
+    joycon = cls(*reader.device_id, transport=transport, **kw)
+    if not paused:
+        transport.resume()
+    return joycon
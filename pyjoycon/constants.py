@@ -2,3 +2,28 @@ JOYCON_VENDOR_ID    = 0x057E
 JOYCON_L_PRODUCT_ID = 0x2006
 JOYCON_R_PRODUCT_ID = 0x2007
 JOYCON_PRODUCT_IDS = (JOYCON_L_PRODUCT_ID, JOYCON_R_PRODUCT_ID)
+
+# bit of each button in the 24 bit mask of report bytes 3-5, named like the
+# PythonicJoyCon properties
+BUTTON_BITS = {
+    "y": 0, "x": 1, "b": 2, "a": 3, "right_sr": 4, "right_sl": 5, "r": 6, "zr": 7,
+    "minus": 8, "plus": 9, "stick_r_btn": 10, "stick_l_btn": 11,
+    "home": 12, "capture": 13, "charging_grip": 15,
+    "down": 16, "up": 17, "right": 18, "left": 19, "left_sr": 20, "left_sl": 21, "l": 22, "zl": 23,
+}
+
+# the buttons of a simple HID mode (0x3f) report, bit by bit, for bytes 1 and 2
+SIMPLE_BUTTONS_L = (
+    ("down", "right", "left", "up", "left_sl", "left_sr", None, None),
+    ("minus", "plus", "stick_l_btn", "stick_r_btn", "home", "capture", "l", "zl"),
+)
+SIMPLE_BUTTONS_R = (
+    ("a", "x", "b", "y", "right_sl", "right_sr", None, None),
+    ("minus", "plus", "stick_l_btn", "stick_r_btn", "home", "capture", "r", "zr"),
+)
+
+# the (horizontal, vertical) direction of each stick hat value of a 0x3f
+# report, with the joycon held sideways: 0 is up, then clockwise. 8 is neutral.
+HAT_DIRECTIONS = (
+    (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 0),
+)
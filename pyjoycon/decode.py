@@ -0,0 +1,211 @@
+"""
+Offline decoding of recorded `0x30` input reports, without a live device.
+
+Requires `numpy`.
+"""
+import numpy as np
+
+from .joycon import JoyCon
+from .stick import STICK_RAW_RANGE
+
+REPORT_SIZE = JoyCon._INPUT_REPORT_SIZE
+
+REPORT_DTYPE = np.dtype([
+    ("timer",   np.uint8),
+    ("battery", np.uint8),             # high nibble of byte 2: charging bit and level
+    ("stick_l", np.uint16, (2,)),      # (horizontal, vertical), 12 bit
+    ("stick_r", np.uint16, (2,)),      # (horizontal, vertical), 12 bit
+    ("buttons", np.uint32),            # bytes 3-5 as a 24 bit little endian mask
+    ("imu",     np.float32, (3, 6)),   # like JoyCon.get_imu_samples()
+])
+
+# rows decoded at a time, keeps the temporaries in the cpu cache
+_CHUNK_SIZE = 1 << 14
+
+
+def _coeffs(coeff_xyz, sensitivity):
+    # mirrors JoyCon.set_accel_calibration / JoyCon.set_gyro_calibration
+    return [sensitivity / c if c != sensitivity else 1 for c in coeff_xyz]
+
+
+def _view(array, dtype, offset, shape, strides):
+    # an unaligned, strided view into the memory of a contiguous array
+    return np.ndarray(
+        shape=shape, dtype=dtype, buffer=array, offset=offset, strides=strides)
+
+
+def as_report_array(data) -> np.ndarray:
+    """
+    returns `data` as a contiguous (N, 49) uint8 array, without copying if possible.
+
+    arg: data : bytes-like or ndarray : N concatenated input reports
+    """
+    if isinstance(data, np.ndarray):
+        reports = data.astype(np.uint8, copy=False)
+    else:
+        reports = np.frombuffer(data, dtype=np.uint8)
+    if reports.size % REPORT_SIZE:
+        raise ValueError(f"buffer size is not a multiple of {REPORT_SIZE}")
+    return np.ascontiguousarray(reports.reshape(-1, REPORT_SIZE))
+
+
+def decode_reports(
+        data,
+        accel_offset=(0, 0, 0), accel_coeff=(0x4000, 0x4000, 0x4000),
+        gyro_offset=(0, 0, 0), gyro_coeff=(0x343b, 0x343b, 0x343b),
+        ime_yz_coeff=1, out=None) -> np.ndarray:
+    """
+    decodes N `0x30` input reports into a structured array of `REPORT_DTYPE`.
+
+    The calibration arguments take the same values as
+    `JoyCon.set_accel_calibration` and `JoyCon.set_gyro_calibration`.
+    Set `ime_yz_coeff` to -1 to invert the y and z axis like
+    `PythonicJoyCon` does for the left joycon.
+    The "imu" field holds `(accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z)`
+    for each of the three samples.
+
+    Pass a preallocated `out` array to reuse it across calls.
+    """
+    reports = as_report_array(data)
+    n = len(reports)
+    if out is None:
+        out = np.empty(n, dtype=REPORT_DTYPE)
+    elif out.dtype != REPORT_DTYPE or out.shape != (n,) or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a contiguous ({n},) array of REPORT_DTYPE")
+    if n == 0:
+        return out  # an empty capture or batch
+
+    c = ime_yz_coeff
+    ax, ay, az = _coeffs(accel_coeff, 0x4000)
+    gx, gy, gz = _coeffs(gyro_coeff, 0x343b)
+    scale = np.array([ax, ay * c, az * c, gx, gy * c, gz * c] * 3)
+    bias = np.array([*accel_offset, *gyro_offset] * 3) * scale
+
+    chunk = min(n, _CHUNK_SIZE)
+    scale = np.broadcast_to(scale.astype(np.float32), (chunk, 18)).copy()
+    bias = np.broadcast_to(bias.astype(np.float32), (chunk, 18)).copy()
+    imu = np.empty((chunk, 18), dtype=np.float32)
+
+    size = REPORT_DTYPE.itemsize
+    stick_offset = REPORT_DTYPE.fields["stick_l"][1]
+    imu_offset = REPORT_DTYPE.fields["imu"][1]
+
+    for start in range(0, n, chunk):
+        src = reports[start:start + chunk]
+        dst = out[start:start + chunk]
+        m = len(src)
+        if m != chunk:
+            scale, bias, imu = scale[:m], bias[:m], imu[:m]
+
+        dst["timer"] = src[:, 1]
+        np.right_shift(src[:, 2], 4, out=dst["battery"])
+
+        # bytes 2-5 as one uint32, the low byte is dropped
+        np.right_shift(
+            _view(src, "<u4", 2, (m,), (REPORT_SIZE,)), 8, out=dst["buttons"])
+
+        # each stick is a packed 24 bit (horizontal, vertical) pair
+        packed = _view(src, "<u4", 6, (m, 2), (REPORT_SIZE, 3))
+        sticks = _view(dst, np.uint16, stick_offset, (m, 2, 2), (size, 4, 2))
+        np.bitwise_and(packed, 0xFFF, out=sticks[:, :, 0], casting="unsafe")
+        sticks[:, :, 1] = (packed >> 12) & 0xFFF
+
+        raw = _view(src, "<i2", JoyCon._IMU_OFFSET, (m, 18), (REPORT_SIZE, 2))
+        np.copyto(imu, raw, casting="unsafe")
+        imu *= scale
+        np.subtract(imu, bias, out=_view(dst, np.float32, imu_offset, (m, 18), (size, 4)))
+
+    return out
+
+
+# the offset of each (stick, axis) table in the flattened stick tables
+_STICK_TABLE_OFFSETS = np.arange(4, dtype=np.intp).reshape(2, 2) * STICK_RAW_RANGE
+
+
+def calibrate_sticks(decoded, tables) -> np.ndarray:
+    """
+    returns the sticks of `decode_reports()` normalized to [-1, 1], as a
+    float32 (N, 2, 2) array of (stick_l, stick_r) (horizontal, vertical).
+
+    arg: tables : the lookup tables of `JoyCon.get_stick_tables()`, or
+                  a (4, 4096) array of them to convert only once
+    """
+    lut = np.asarray(tables, dtype=np.float32).reshape(-1)
+    raw = np.stack([decoded["stick_l"], decoded["stick_r"]], axis=1)
+    return lut.take(raw + _STICK_TABLE_OFFSETS)
+
+
+# like PythonicJoyCon.gyro_in_rad
+_GYRO_RAD = 0.0001694 * 2 * 3.1415926536
+
+
+def sample_periods(timer, max_gap=0.1) -> np.ndarray:
+    """
+    returns the time covered by each IMU sample of N reports, a (N * 3,)
+    array, from their timer bytes. Like `GyroTrackingJoyCon`, the three
+    samples of a report share the time since the previous report, and gaps
+    longer than `max_gap` seconds count as one sample period.
+    """
+    timer = np.asarray(timer, dtype=np.uint8)
+    elapsed = np.empty(len(timer))
+    if not len(timer):
+        return elapsed
+    elapsed[0] = 0
+    elapsed[1:] = np.diff(timer)  # wraps around like the timer
+    elapsed *= JoyCon._TIMER_PERIOD
+    invalid = (elapsed <= 0) | (elapsed > max_gap)
+    elapsed[invalid] = 3 * JoyCon._IMU_SAMPLE_PERIOD
+    return np.repeat(elapsed / 3, 3)
+
+
+def _quat_multiply(a, b):
+    # hamilton products of (..., 4) arrays of (w, x, y, z) quaternions
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ], axis=-1)
+
+
+def integrate_gyro(gyro, dt=JoyCon._IMU_SAMPLE_PERIOD, orientation=(1, 0, 0, 0)) -> np.ndarray:
+    """
+    returns the orientation after each of N gyro samples as a (N, 4) array of
+    `(w, x, y, z)` quaternions, integrated like `GyroTrackingJoyCon.direction_Q`.
+
+    arg: gyro        : (N, 3) angular velocity in rad/s
+    arg: dt          : the period of every sample, a scalar or (N,) array
+    arg: orientation : the starting orientation
+
+    The rotations of all samples are chained with a parallel prefix scan,
+    in log2(N) vectorized steps.
+    """
+    rotation = -np.asarray(gyro, dtype=np.float64) * np.reshape(dt, (-1, 1))
+    angle = np.sqrt(np.einsum("ij,ij->i", rotation, rotation))
+    half = angle * 0.5
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = np.where(angle > 0, np.sin(half) / angle, 0.5)
+    q = np.empty((len(rotation), 4))
+    q[:, 0] = np.cos(half)
+    q[:, 1:] = rotation * s[:, None]
+
+    # q[i] becomes the product of the rotations of samples 0..i, newest first
+    shift = 1
+    while shift < len(q):
+        q[shift:] = _quat_multiply(q[shift:], q[:-shift])
+        shift *= 2
+
+    q = _quat_multiply(q, np.asarray(orientation, dtype=np.float64))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return q
+
+
+def orientations(decoded, orientation=(1, 0, 0, 0)) -> np.ndarray:
+    """
+    returns the orientation after each IMU sample of reports decoded by
+    `decode_reports`, as a (N * 3, 4) array of `(w, x, y, z)` quaternions.
+    """
+    gyro = decoded["imu"][:, :, 3:].reshape(-1, 3) * _GYRO_RAD
+    return integrate_gyro(gyro, sample_periods(decoded["timer"]), orientation)
@@ -1,28 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import ctypes
+import ctypes.util
 import hid
+import os
+import select
+import struct
+import sys
+import threading
+import time
 from .constants import JOYCON_VENDOR_ID, JOYCON_PRODUCT_IDS
 from .constants import JOYCON_L_PRODUCT_ID, JOYCON_R_PRODUCT_ID
+from .joycon import JoyCon
 
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
 
-def get_device_ids(debug=False):
+# how long, in seconds, an enumeration of the HID bus is reused
+ENUMERATION_TTL = 0.5
+
+_enumeration_lock = threading.Lock()
+_enumeration = (float("-inf"), [])  # (monotonic time, joycon device infos)
+
+
+def _enumerate_joycons(max_age=ENUMERATION_TTL):
+    global _enumeration
+    with _enumeration_lock:
+        taken, devices = _enumeration
+        if time.monotonic() - taken > max_age:
+            # let hid filter on the vendor, instead of listing the whole bus
+            devices = [
+                device for device in hid.enumerate(JOYCON_VENDOR_ID, 0)
+                if device["vendor_id"] == JOYCON_VENDOR_ID
+                and device["product_id"] in JOYCON_PRODUCT_IDS
+                and device["product_string"]
+            ]
+            _enumeration = (time.monotonic(), devices)
+        return devices
+
+
+def get_device_ids(debug=False, max_age=ENUMERATION_TTL):
     """
     returns a list of tuples like `(vendor_id, product_id, serial_number)`
-    """
-    devices = hid.enumerate(0, 0)
 
+    The HID bus is enumerated at most once per `max_age` seconds,
+    pass `max_age=0` to force a fresh enumeration.
+    """
     out = []
-    for device in devices:
+    for device in _enumerate_joycons(max_age):
         vendor_id      = device["vendor_id"]
         product_id     = device["product_id"]
         product_string = device["product_string"]
         serial = device.get('serial') or device.get("serial_number")
 
-        if vendor_id != JOYCON_VENDOR_ID:
-            continue
-        if product_id not in JOYCON_PRODUCT_IDS:
-            continue
-        if not product_string:
-            continue
-
         out.append((vendor_id, product_id, serial))
 
         if debug:
@@ -75,3 +106,239 @@ def get_L_id(**kw):
     if not ids:
         return (None, None, None)
     return ids[0]
+
+
+def connect_all(ids=None, cls=JoyCon, timeout=10.0, return_exceptions=False, **kw):
+    """
+    connects to many JoyCons at once, returns a list of `cls` instances
+
+    arg: ids     : list : tuples like `(vendor_id, product_id, serial_number)`,
+                          defaults to every JoyCon found
+    arg: timeout : float : seconds each device may take to connect
+
+    All devices are opened and calibrated concurrently, so this takes about
+    as long as the slowest device. If `return_exceptions` is set, a failed
+    device shows up as its exception in the result, otherwise the first
+    failure is raised once every device is done.
+    """
+    if ids is None:
+        ids = get_device_ids()
+    if not ids:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=len(ids))
+    futures = [executor.submit(cls, *i, **kw) for i in ids]
+    wait(futures, timeout)
+    executor.shutdown(wait=False)
+
+    out = []
+    for device_id, future in zip(ids, futures):
+        if future.done() and future.exception() is None:
+            out.append(future.result())
+            continue
+        if future.done():
+            error = future.exception()
+        else:
+            error = TimeoutError(f"connecting to {device_id!r} timed out")
+            # don't leak the connection if it does come through later
+            future.add_done_callback(
+                lambda f: f.exception() is None and f.result()._close())
+        out.append(error)
+
+    if not return_exceptions:
+        for result in out:
+            if isinstance(result, BaseException):
+                for joycon in out:
+                    if not isinstance(joycon, BaseException):
+                        joycon._close()
+                raise result
+    return out
+
+
+class _PollSource:
+    """Wakes the monitor every `interval` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return True
+
+    def close(self):
+        pass
+
+
+class _UdevSource:
+    """Wakes the monitor on udev hidraw events."""
+
+    def __init__(self):
+        self._monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        self._monitor.filter_by("hidraw")
+        self._monitor.start()
+
+    def wait(self, timeout):
+        changed = False
+        # collect the burst of events a single device causes
+        while self._monitor.poll(timeout) is not None:
+            changed, timeout = True, 0.1
+        return changed
+
+    def close(self):
+        pass
+
+
+class _InotifySource:
+    """Wakes the monitor when a /dev/hidraw* node is created or removed."""
+    _IN_CREATE = 0x100
+    _IN_DELETE = 0x200
+    _IN_NONBLOCK = os.O_NONBLOCK
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(self._IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, b"/dev", self._IN_CREATE | self._IN_DELETE) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def _hidraw_changed(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, size = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + size].rstrip(b"\0")
+                offset += size
+                changed |= name.startswith(b"hidraw")
+
+    def wait(self, timeout):
+        changed = False
+        # collect the burst of events a single device causes
+        while select.select([self._fd], [], [], timeout)[0]:
+            changed |= self._hidraw_changed()
+            timeout = 0.1
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class DeviceMonitor:
+    """
+    Watches the HID bus for JoyCons being attached and detached.
+
+        monitor = DeviceMonitor(on_attach=print, on_detach=print,
+                                joycon_class=PythonicJoyCon)
+        monitor.start()
+
+    Device ids are tuples like `(vendor_id, product_id, serial_number)`,
+    found by diffing enumerations of the bus. On Linux, the bus is only
+    enumerated again when udev (if `pyudev` is installed) or inotify reports
+    a change to the hidraw devices; elsewhere it is polled every
+    `poll_interval` seconds.
+
+    With `joycon_class`, a JoyCon is constructed for every attached device
+    (with `joycon_kw`) and closed when it is detached. The callbacks are
+    called on the monitor thread as `callback(device_id, joycon)`, where
+    joycon is None without `joycon_class`.
+    """
+
+    def __init__(self, on_attach=None, on_detach=None, joycon_class=None,
+                 poll_interval=1.0, **joycon_kw):
+        self.on_attach = on_attach
+        self.on_detach = on_detach
+        self.joycon_class = joycon_class
+        self.joycon_kw = joycon_kw
+        self.poll_interval = poll_interval
+        self.devices = set()
+        self.joycons = {}
+        self._running = False
+        self._thread = None
+
+    def _make_source(self):
+        if sys.platform.startswith("linux"):
+            if pyudev is not None:
+                try:
+                    return _UdevSource()
+                except Exception:
+                    pass
+            try:
+                return _InotifySource()
+            except OSError:
+                pass
+        return _PollSource(self.poll_interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._source = self._make_source()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, close_joycons=True):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if close_joycons:
+            for joycon in self.joycons.values():
+                joycon._close()
+            self.joycons.clear()
+
+    def _run(self):  # monitor thread
+        try:
+            retry = self.update()
+            while self._running:
+                # wakes up now and then to notice stop(), and to retry failed connects
+                if self._source.wait(self.poll_interval) or retry:
+                    retry = self.update()
+        finally:
+            self._source.close()
+
+    def update(self) -> bool:
+        """
+        diffs a fresh enumeration against the known devices and emits events.
+        returns True if some attached device could not be connected yet.
+        """
+        current = set(get_device_ids(max_age=0))
+        attached = current - self.devices
+        detached = self.devices - current
+
+        for device_id in detached:
+            self.devices.discard(device_id)
+            joycon = self.joycons.pop(device_id, None)
+            if joycon is not None:
+                joycon._close()
+            if self.on_detach:
+                self.on_detach(device_id, joycon)
+
+        if not attached:
+            return False
+
+        attached = sorted(attached, key=repr)
+        if self.joycon_class is None:
+            joycons = [None] * len(attached)
+        else:
+            joycons = connect_all(
+                attached, cls=self.joycon_class, return_exceptions=True, **self.joycon_kw)
+
+        retry = False
+        for device_id, joycon in zip(attached, joycons):
+            if isinstance(joycon, BaseException):
+                retry = True  # not ready yet, try again on the next update
+                continue
+            self.devices.add(device_id)
+            if joycon is not None:
+                self.joycons[device_id] = joycon
+            if self.on_attach:
+                self.on_attach(device_id, joycon)
+        return retry
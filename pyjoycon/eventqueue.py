@@ -0,0 +1,106 @@
+import collections
+import queue
+import threading
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+COALESCE = "coalesce"
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+
+class EventQueue:
+    """
+    A bounded, thread-safe queue of `(button, state)` events.
+
+    The reader thread `put`s events, consumers `get` them one at a time,
+    optionally sleeping until one arrives, or `drain` them in batches.
+    When the queue holds `maxsize` events, a new one is handled according
+    to `overflow`:
+
+        drop_oldest : the oldest queued event is dropped
+        drop_newest : the new event is dropped
+        coalesce    : the oldest queued press and release of one button are
+                      dropped together, so the state they leave behind is
+                      unchanged. Drops the oldest event if there is no pair.
+
+    `dropped` counts every event lost to overflow, `coalesced` the pairs.
+    """
+
+    def __init__(self, maxsize: int = 1024, overflow: str = DROP_OLDEST):
+        if maxsize < 1:
+            raise ValueError(f'maxsize is invalid: {maxsize!r}')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow is invalid: {overflow!r}')
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.coalesced = 0
+        self._events = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+
+    def __len__(self):
+        return len(self._events)
+
+    def _coalesce(self) -> bool:
+        # drop the first press of a button which is released later on
+        events = self._events
+        pressed = {}
+        for i, (button, state) in enumerate(events):
+            if state:
+                pressed.setdefault(button, i)
+            elif button in pressed:
+                del events[i]
+                del events[pressed[button]]
+                self.dropped += 2
+                self.coalesced += 1
+                return True
+        return False
+
+    def put(self, event) -> bool:
+        """adds an event, returns False if it was dropped"""
+        with self._cond:
+            events = self._events
+            if len(events) >= self.maxsize:
+                if self.overflow == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.overflow != COALESCE or not self._coalesce():
+                    events.popleft()
+                    self.dropped += 1
+            events.append(event)
+            self._cond.notify()
+        return True
+
+    def get(self, block=True, timeout: float = None):
+        """
+        returns the oldest event. If `block` is set, waits up to `timeout`
+        seconds, forever if None, for one to arrive. Raises `queue.Empty`
+        if there is none, like the standard library queues.
+        """
+        with self._cond:
+            if block and not self._cond.wait_for(lambda: self._events, timeout):
+                raise queue.Empty
+            if not self._events:
+                raise queue.Empty
+            return self._events.popleft()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def drain(self, max_n: int = None, timeout: float = 0) -> list:
+        """
+        returns up to `max_n` of the oldest events, all of them if None.
+        Waits up to `timeout` seconds for the first one, forever if None,
+        and returns an empty list if none arrived.
+        """
+        with self._cond:
+            events = self._events
+            if timeout != 0:
+                self._cond.wait_for(lambda: events, timeout)
+            n = len(events) if max_n is None else min(max_n, len(events))
+            return [events.popleft() for _ in range(n)]
+
+    def clear(self):
+        with self._cond:
+            self._events.clear()
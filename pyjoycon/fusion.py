@@ -0,0 +1,175 @@
+"""
+Madgwick sensor fusion: gyro integration corrected towards gravity by the
+accelerometer, so pitch and roll don't drift.
+
+The filter runs live in `FusionTrackingJoyCon`, or offline with
+`madgwick_batch` over recorded samples. Both evaluate the same arithmetic
+in the same order on float64, so their results are identical.
+"""
+from glm import quat
+from math import sqrt
+
+from .gyro import GyroTrackingJoyCon
+
+# the filter gain, how fast the accelerometer pulls the orientation back
+BETA = 0.1
+
+# like PythonicJoyCon.accel_in_g
+_ACCEL_G = 4.0 / 0x4000
+
+# with fewer sessions than this, madgwick_batch steps through plain floats,
+# which is faster than a numpy call per operation
+_MIN_VECTOR_BATCH = 16
+
+
+# the filter is written once, on values which may be floats or numpy arrays
+
+def _rate(qw, qx, qy, qz, gx, gy, gz):
+    # the derivative of the orientation from the gyro, 0.5 * q * (0, g)
+    return (
+        0.5 * (-qx * gx - qy * gy - qz * gz),
+        0.5 * (qw * gx + qy * gz - qz * gy),
+        0.5 * (qw * gy - qx * gz + qz * gx),
+        0.5 * (qw * gz + qx * gy - qy * gx),
+    )
+
+
+def _gradient(qw, qx, qy, qz, ax, ay, az, sqrt):
+    # the gradient of the error between the measured and expected gravity
+    r = 1.0 / sqrt(ax * ax + ay * ay + az * az)
+    ax, ay, az = ax * r, ay * r, az * r
+    qww, qxx, qyy, qzz = qw * qw, qx * qx, qy * qy, qz * qz
+    s0 = 4.0 * qw * qyy + 2.0 * qy * ax + 4.0 * qw * qxx - 2.0 * qx * ay
+    s1 = (4.0 * qx * qzz - 2.0 * qz * ax + 4.0 * qww * qx - 2.0 * qw * ay - 4.0 * qx
+          + 8.0 * qx * qxx + 8.0 * qx * qyy + 4.0 * qx * az)
+    s2 = (4.0 * qww * qy + 2.0 * qw * ax + 4.0 * qy * qzz - 2.0 * qz * ay - 4.0 * qy
+          + 8.0 * qy * qxx + 8.0 * qy * qyy + 4.0 * qy * az)
+    s3 = 4.0 * qxx * qz - 2.0 * qx * ax + 4.0 * qyy * qz - 2.0 * qy * ay
+    return s0, s1, s2, s3, s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+
+
+def _correct(dw, dx, dy, dz, s0, s1, s2, s3, n, beta, sqrt):
+    # steps the derivative against the normalized gradient
+    r = beta / sqrt(n)
+    return dw - s0 * r, dx - s1 * r, dy - s2 * r, dz - s3 * r
+
+
+def _integrate(qw, qx, qy, qz, dw, dx, dy, dz, dt, sqrt):
+    qw, qx, qy, qz = qw + dw * dt, qx + dx * dt, qy + dy * dt, qz + dz * dt
+    r = 1.0 / sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+    return qw * r, qx * r, qy * r, qz * r
+
+
+def madgwick_update(q, sample, dt, beta=BETA) -> tuple:
+    """
+    returns the orientation `q` advanced by one IMU sample.
+
+    arg: q      : (w, x, y, z), rotating joycon coordinates to world coordinates
+    arg: sample : (accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z) in g and rad/s
+    arg: dt     : the sample period in seconds
+    """
+    qw, qx, qy, qz = q
+    ax, ay, az, gx, gy, gz = sample
+    dw, dx, dy, dz = _rate(qw, qx, qy, qz, gx, gy, gz)
+    if ax or ay or az:
+        s0, s1, s2, s3, n = _gradient(qw, qx, qy, qz, ax, ay, az, sqrt)
+        if n:
+            dw, dx, dy, dz = _correct(dw, dx, dy, dz, s0, s1, s2, s3, n, beta, sqrt)
+    return _integrate(qw, qx, qy, qz, dw, dx, dy, dz, dt, sqrt)
+
+
+def _batch_floats(samples, dt, beta, q0):
+    # samples (B, T, 6), dt (B, T)
+    import numpy as np
+    out = np.empty(samples.shape[:2] + (4,))
+    for b, (session, periods) in enumerate(zip(samples.tolist(), dt.tolist())):
+        q = q0
+        row = []
+        for sample, period in zip(session, periods):
+            q = madgwick_update(q, sample, period, beta)
+            row.append(q)
+        out[b] = row
+    return out
+
+
+def _batch_vectors(samples, dt, beta, q0):
+    # samples (B, T, 6), dt (B, T), steps through time for all sessions at once
+    import numpy as np
+    sqrt, where = np.sqrt, np.where
+    columns = np.ascontiguousarray(samples.transpose(1, 2, 0))  # (T, 6, B)
+    periods = np.ascontiguousarray(dt.T)
+    has_accel = (columns[:, 0] != 0) | (columns[:, 1] != 0) | (columns[:, 2] != 0)
+    out = np.empty((len(columns), 4, samples.shape[0]))
+    qw, qx, qy, qz = (np.full(samples.shape[0], float(c)) for c in q0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for t, (ax, ay, az, gx, gy, gz) in enumerate(columns):
+            d = _rate(qw, qx, qy, qz, gx, gy, gz)
+            *s, n = _gradient(qw, qx, qy, qz, ax, ay, az, sqrt)
+            valid = has_accel[t] & (n != 0)
+            corrected = _correct(*d, *s, n, beta, sqrt)
+            dw, dx, dy, dz = (where(valid, c, di) for c, di in zip(corrected, d))
+            qw, qx, qy, qz = out[t] = _integrate(qw, qx, qy, qz, dw, dx, dy, dz, periods[t], sqrt)
+    return out.transpose(2, 0, 1)
+
+
+def madgwick_batch(samples, dt=GyroTrackingJoyCon._IMU_SAMPLE_PERIOD, beta=BETA,
+                   orientation=(1, 0, 0, 0)):
+    """
+    runs the filter over recorded samples, returns the orientation after
+    every sample as `(w, x, y, z)` quaternions, shaped (..., N, 3, 4).
+
+    arg: samples     : (..., N, 3, 6) array of N reports of three samples, in g
+                       and rad/s, each leading index an independent session.
+                       A single (3, 6) report gives a (3, 4) result
+    arg: dt          : the sample periods, a scalar or an array broadcasting
+                       to (..., N, 3), like `decode.sample_periods()`
+    arg: orientation : the starting orientation of every session
+
+    Many sessions are filtered side by side, vectorized over the leading
+    axes. The results are identical to feeding the samples through
+    `madgwick_update` one at a time, which is what a single session does.
+    """
+    import numpy as np
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.shape[-2:] != (3, 6):
+        raise ValueError(f"samples must be shaped (..., N, 3, 6), not {samples.shape}")
+    lead = samples.shape[:-2]
+    dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), lead + (3,))
+
+    if not samples.size:
+        return np.empty(lead + (3, 4))  # no sessions, or sessions without reports
+
+    n = samples.shape[-3] if samples.ndim > 2 else 1
+    flat = samples.reshape(-1, n * 3, 6)
+    periods = dt.reshape(-1, n * 3)
+    q0 = tuple(float(c) for c in orientation)
+    if len(flat) < _MIN_VECTOR_BATCH:
+        out = _batch_floats(flat, periods, beta, q0)
+    else:
+        out = _batch_vectors(flat, periods, beta, q0)
+    return out.reshape(lead + (3, 4))
+
+
+class FusionTrackingJoyCon(GyroTrackingJoyCon):
+    """
+    A GyroTrackingJoyCon which corrects the gyro with the accelerometer,
+    running a Madgwick filter with gain `beta` on every IMU sample.
+    `fusion_q` is the filter's `(w, x, y, z)` orientation.
+    """
+
+    def __init__(self, *args, beta=BETA, **kwargs):
+        self.beta = beta
+        super().__init__(*args, **kwargs)
+
+    def reset_orientation(self):
+        super().reset_orientation()
+        self.fusion_q = (1.0, 0.0, 0.0, 0.0)
+
+    def _update_orientation(self, dt):
+        ca, cg, beta = _ACCEL_G, self._GYRO_RAD, self.beta
+        q = self.fusion_q
+        for ax, ay, az, gx, gy, gz in self.get_imu_samples():
+            q = madgwick_update(q, (ax * ca, ay * ca, az * ca, gx * cg, gy * cg, gz * cg), dt, beta)
+        self.fusion_q = q
+        # direction_Q maps world directions back to the joycon, the inverse
+        self.direction_Q = quat(q[0], -q[1], -q[2], -q[3])
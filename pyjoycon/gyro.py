@@ -1,5 +1,6 @@
 from .wrappers import PythonicJoyCon
-from glm import vec2, vec3, quat, angleAxis, eulerAngles
+from glm import vec2, vec3, quat, eulerAngles, normalize
+from math import cos, sin, sqrt
 from typing import Optional
 import time
 
@@ -10,11 +11,21 @@ class GyroTrackingJoyCon(PythonicJoyCon):
     and deduces the current rotation of the JoyCon. Can be used to create a
     pointer rotate an object or pointin a direction. Comes with the need to be
     calibrated.
+
+    The orientation is kept as one quaternion, `direction_Q`. Each gyro
+    sample rotates it by its rotation vector over the 5 ms sample period,
+    stretched by the timer byte when reports arrive late or went missing.
     """
+    # longest gap between reports to integrate over, longer ones are ignored
+    _MAX_TIMER_GAP = 0.1
+    # like PythonicJoyCon.gyro_in_rad
+    _GYRO_RAD = 0.0001694 * 2 * 3.1415926536
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, simple_mode=False, **kwargs)
 
         # set internal state:
+        self._gyro_timer = None
         self.reset_orientation()
 
         # register the update callback
@@ -31,6 +42,18 @@ class GyroTrackingJoyCon(PythonicJoyCon):
     def direction(self) -> vec3:
         return self.direction_X
 
+    @property
+    def direction_X(self) -> vec3:
+        return vec3(1, 0, 0) * self.direction_Q
+
+    @property
+    def direction_Y(self) -> vec3:
+        return vec3(0, 1, 0) * self.direction_Q
+
+    @property
+    def direction_Z(self) -> vec3:
+        return vec3(0, 0, 1) * self.direction_Q
+
     @property
     def rotation(self) -> vec3:
         return -eulerAngles(self.direction_Q)
@@ -56,11 +79,20 @@ class GyroTrackingJoyCon(PythonicJoyCon):
         self.set_gyro_calibration(gyro_offset)
 
     def reset_orientation(self):
-        self.direction_X = vec3(1, 0, 0)
-        self.direction_Y = vec3(0, 1, 0)
-        self.direction_Z = vec3(0, 0, 1)
         self.direction_Q = quat()
 
+    def _sample_period(self) -> float:
+        # the time covered by each sample of the current report, from the
+        # timer ticks since the previous one
+        timer = self._input_report[1]
+        last, self._gyro_timer = self._gyro_timer, timer
+        if last is None:
+            return self._IMU_SAMPLE_PERIOD
+        elapsed = ((timer - last) & 0xFF) * self._TIMER_PERIOD
+        if not 0 < elapsed <= self._MAX_TIMER_GAP:
+            return self._IMU_SAMPLE_PERIOD
+        return elapsed / 3
+
     @staticmethod
     def _gyro_update_hook(self):
         if self.is_calibrating:
@@ -71,14 +103,16 @@ class GyroTrackingJoyCon(PythonicJoyCon):
                     self.calibration_acumulator += xyz
                 self.calibration_acumulations += 3
 
-        for gx, gy, gz in self.gyro_in_rad:
-            # TODO: find out why 1/86 works, and not 1/60 or 1/(60*30)
-            rotation \
-                = angleAxis(gx * (-1/86), self.direction_X) \
-                * angleAxis(gy * (-1/86), self.direction_Y) \
-                * angleAxis(gz * (-1/86), self.direction_Z)
-
-            self.direction_X *= rotation
-            self.direction_Y *= rotation
-            self.direction_Z *= rotation
-            self.direction_Q *= rotation
+        self._update_orientation(self._sample_period())
+
+    def _update_orientation(self, dt):
+        k = -dt * self._GYRO_RAD
+        q = self.direction_Q
+        for _, _, _, gx, gy, gz in self.get_imu_samples():
+            # the rotation vector of this sample, in the joycon's own frame
+            x, y, z = gx * k, gy * k, gz * k
+            angle = sqrt(x * x + y * y + z * z)
+            if angle:
+                s = sin(angle * 0.5) / angle
+                q = quat(cos(angle * 0.5), x * s, y * s, z * s) * q
+        self.direction_Q = normalize(q)
@@ -0,0 +1,110 @@
+from array import array
+
+
+class ReportRingBuffer:
+    """
+    A fixed capacity history of input reports, written by the reader thread.
+
+    All reports live in one preallocated bytearray. Every report gets a
+    monotonically increasing sequence number and a host timestamp.
+    There is a single writer and no locking: the writer publishes a report by
+    bumping `head` after the slot is filled.
+
+    Slices returned by `reports_since` are zero-copy memoryviews, which the
+    writer reuses once `capacity` newer reports have arrived. Copy them with
+    `bytes()` or check `is_valid(seq)` if you hold on to them for long.
+    The buffer has one slot more than `capacity`, the one the writer fills
+    next, which is never handed out.
+
+    Each consumer reads through its own `cursor()`, which counts the
+    reports it lost to the writer.
+    """
+
+    def __init__(self, capacity: int, report_size: int = 49):
+        if capacity < 1:
+            raise ValueError(f'capacity is invalid: {capacity!r}')
+        self.capacity = capacity
+        self.report_size = report_size
+        self.head = 0       # sequence number of the next report
+        self._slots = capacity + 1
+        self._buffer = bytearray(self._slots * report_size)
+        self._view = memoryview(self._buffer)
+        self._timestamps = array('d', bytes(8 * self._slots))
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    def append(self, report, timestamp: float) -> int:
+        seq = self.head
+        slot = seq % self._slots
+        start = slot * self.report_size
+        self._buffer[start:start + self.report_size] = report
+        self._timestamps[slot] = timestamp
+        self.head = seq + 1
+        return seq
+
+    def is_valid(self, seq: int) -> bool:
+        return self.head - self.capacity <= seq < self.head
+
+    def get(self, seq: int):
+        """returns a tuple like `(seq, timestamp, memoryview)`"""
+        if not self.is_valid(seq):
+            raise IndexError(f'report {seq} is not in the history')
+        slot = seq % self._slots
+        start = slot * self.report_size
+        return seq, self._timestamps[slot], self._view[start:start + self.report_size]
+
+    def reports_since(self, seq: int) -> list:
+        """
+        returns a list of tuples like `(seq, timestamp, memoryview)` for every
+        report numbered `seq` or later which is still in the history. The
+        first seq returned tells how many were lost.
+        """
+        head = self.head
+        size = self.report_size
+        out = []
+        for i in range(max(seq, head - self.capacity, 0), head):
+            slot = i % self._slots
+            start = slot * size
+            out.append((i, self._timestamps[slot], self._view[start:start + size]))
+        # drop what the writer overwrote meanwhile
+        oldest = self.head - self.capacity
+        if out and out[0][0] < oldest:
+            del out[:oldest - out[0][0]]
+        return out
+
+    def cursor(self, seq: int = None) -> "ReportCursor":
+        """returns a cursor reading from `seq` on, from the next report by default"""
+        return ReportCursor(self, self.head if seq is None else seq)
+
+
+class ReportCursor:
+    """
+    The read position of one consumer of a ReportRingBuffer.
+
+        cursor = joycon.report_history.cursor()
+        for seq, timestamp, report in cursor.read():
+            ...
+
+    `lost` counts the reports this consumer missed because the writer
+    overwrote them first.
+    """
+
+    def __init__(self, history: ReportRingBuffer, seq: int = 0):
+        self.history = history
+        self.next_seq = seq
+        self.lost = 0
+
+    def read(self) -> list:
+        """returns the reports since the last read, like `reports_since`"""
+        out = self.history.reports_since(self.next_seq)
+        if out:
+            self.lost += out[0][0] - self.next_seq
+            self.next_seq = out[-1][0] + 1
+        else:
+            # nothing readable, anything before the writer's oldest slot is gone
+            oldest = self.history.head - self.history.capacity
+            if oldest > self.next_seq:
+                self.lost += oldest - self.next_seq
+                self.next_seq = oldest
+        return out
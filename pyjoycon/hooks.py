@@ -0,0 +1,177 @@
+"""
+Delivery filters for update hooks, see `JoyCon.register_update_hook`.
+
+The filters run on the reader thread before the hook, and only look at the
+raw report bytes and timestamp, so a skipped report costs no more than a
+slice compare.
+"""
+import functools
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+_log = logging.getLogger(__name__)
+
+# the bytes of a 0x30 report which each field lives in, as (start, stop)
+REPORT_FIELDS = {
+    "battery": (2, 3),
+    "buttons": (3, 6),
+    "stick_l": (6, 9),
+    "stick_r": (9, 12),
+    "sticks":  (6, 12),
+    "imu":     (13, 49),
+}
+
+
+def _field_ranges(fields):
+    # the byte ranges of the fields, merged where they touch or overlap
+    try:
+        ranges = sorted(REPORT_FIELDS[name] for name in fields)
+    except KeyError as e:
+        raise ValueError(f"unknown report field {e.args[0]!r}, "
+                         f"expected one of {', '.join(REPORT_FIELDS)}") from None
+    merged = [list(ranges[0])]
+    for start, stop in ranges[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return [tuple(r) for r in merged]
+
+
+def _field_key(fields):
+    # returns a function of a report, which compares equal while the fields are unchanged
+    ranges = _field_ranges(fields)
+    if len(ranges) == 1:
+        (start, stop), = ranges
+        return lambda report: report[start:stop]
+    return lambda report: tuple(report[start:stop] for start, stop in ranges)
+
+
+class _TrailingTimer:
+    """The thread delivering the last skipped report of rate limited hooks."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._calls = []  # a heap of (when, n, function, args)
+        self._n = itertools.count()  # orders calls due at the same time
+        self.thread = threading.Thread(target=self._run, name="JoyConHookTimer", daemon=True)
+        self.thread.start()
+
+    def call_at(self, when: float, function, *args):
+        """calls `function(*args)` at time.monotonic() `when`"""
+        with self._cond:
+            heapq.heappush(self._calls, (when, next(self._n), function, args))
+            self._cond.notify()
+
+    def _run(self):
+        calls = self._calls
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if calls and calls[0][0] <= now:
+                        break
+                    self._cond.wait(calls[0][0] - now if calls else None)
+                _, _, function, args = heapq.heappop(calls)
+            try:
+                function(*args)
+            except Exception:
+                # the thread is shared by every hook, keep it going for the others
+                _log.exception("trailing call of an update hook failed")
+
+
+_trailing_timer = None
+_trailing_timer_lock = threading.Lock()
+
+
+def _get_trailing_timer():
+    global _trailing_timer
+    with _trailing_timer_lock:
+        if _trailing_timer is None:
+            _trailing_timer = _TrailingTimer()
+        return _trailing_timer
+
+
+def filter_hook(callback, every: int = 1, max_rate: float = None, fields=None):
+    """
+    returns `callback` wrapped to run only on some reports:
+
+        every    : on every Nth report
+        fields   : only when one of the `REPORT_FIELDS` named changed since
+                   it last ran, like ("buttons", "sticks")
+        max_rate : at most this many times per second. Skipped reports are
+                   coalesced, the hook sees the latest state when it runs.
+                   With `fields`, a change which came too soon is delivered
+                   with the next report once the hook is due again. If no
+                   report comes by then, like in simple mode, which only
+                   reports changes, the skipped state is delivered from a
+                   timer thread, so the hook always sees the final state.
+
+    Returns `callback` itself when there is nothing to filter.
+    """
+    if every < 1:
+        raise ValueError(f'every is invalid: {every!r}')
+    if max_rate is not None and max_rate <= 0:
+        raise ValueError(f'max_rate is invalid: {max_rate!r}')
+    if every == 1 and max_rate is None and not fields:
+        return callback
+
+    key = _field_key(fields) if fields else None
+    interval = 1 / max_rate if max_rate else 0.0
+    # pending: a report was skipped for the rate, and not delivered since
+    state = {"count": 0, "due": float("-inf"), "last": None, "pending": False}
+    # the reader and the timer thread take turns running a rate limited hook
+    lock = threading.Lock()
+
+    def trailing(joycon, due):  # timer thread
+        with lock:
+            if not state["pending"] or state["due"] != due:
+                return  # a report came in time
+            state["pending"] = False
+            if hook not in joycon._input_hooks:
+                return  # unregistered meanwhile
+            if key is not None:
+                current = key(joycon._input_report)
+                if current == state["last"]:
+                    return
+                state["last"] = current
+            state["due"] = time.monotonic() + interval
+            callback(joycon)
+
+    @functools.wraps(callback)
+    def hook(joycon):
+        if every > 1:
+            state["count"] += 1
+            if state["count"] < every:
+                return
+            state["count"] = 0
+        if key is not None:
+            current = key(joycon._input_report)
+            if current == state["last"]:
+                return
+        if not interval:
+            if key is not None:
+                state["last"] = current
+            callback(joycon)
+            return
+
+        with lock:
+            now, due = joycon._report_time, state["due"]
+            if now < due:
+                if not state["pending"]:
+                    state["pending"] = True
+                    # late enough that the next report, if any, delivers it first
+                    _get_trailing_timer().call_at(
+                        due + 1.5 * joycon._INPUT_REPORT_PERIOD, trailing, joycon, due)
+                return
+            state["pending"] = False
+            # keep to the schedule, unless the hook fell a whole interval behind
+            state["due"] = due + interval if now - due < interval else now + interval
+            if key is not None:
+                state["last"] = current
+            callback(joycon)
+
+    return hook
@@ -1,6 +1,17 @@
 from .constants import JOYCON_VENDOR_ID, JOYCON_PRODUCT_IDS
 from .constants import JOYCON_L_PRODUCT_ID, JOYCON_R_PRODUCT_ID
-import hid
+from .constants import BUTTON_BITS, SIMPLE_BUTTONS_L, SIMPLE_BUTTONS_R
+from .cache import CalibrationCache
+from .history import ReportRingBuffer
+from .hooks import filter_hook
+from .output import OutputWriter
+from .state import JoyConState
+from .stats import ReportStats
+from . import stick
+from .transport import HidTransport
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import collections
+import struct
 import time
 import threading
 from typing import Optional
@@ -8,10 +19,39 @@ from typing import Optional
 # TODO: disconnect, power off sequence
 
 
+def _simple_button_tables(names):
+    # for bytes 1 and 2 of a 0x3f report, the 0x30 button mask of every value
+    tables = []
+    for byte in names:
+        bits = [1 << BUTTON_BITS[name] if name else 0 for name in byte]
+        tables.append(tuple(
+            sum(bit for i, bit in enumerate(bits) if value >> i & 1)
+            for value in range(256)))
+    return tuple(tables)
+
+
+_SIMPLE_BUTTON_TABLES = {
+    JOYCON_L_PRODUCT_ID: _simple_button_tables(SIMPLE_BUTTONS_L),
+    JOYCON_R_PRODUCT_ID: _simple_button_tables(SIMPLE_BUTTONS_R),
+}
+
+
 class JoyCon:
     _INPUT_REPORT_SIZE = 49
     _INPUT_REPORT_PERIOD = 0.015
+    _TIMER_PERIOD = 0.005  # one tick of the timer byte, report[1]
+    _IMU_SAMPLE_PERIOD = 0.005  # three samples per report
+    _SUBCMD_TIMEOUT = 1.0
     _RUMBLE_DATA = b'\x00\x01\x40\x40\x00\x01\x40\x40'
+    # the controller takes about one output report per input report
+    _OUTPUT_REPORT_INTERVAL = 0.015
+    # subcommands which only set a state, a newer one supersedes a waiting one
+    _COALESCED_SUBCMDS = frozenset((0x03, 0x30, 0x40, 0x48))
+    # three samples of (accel xyz, gyro xyz) starting at byte 13
+    _IMU_STRUCT = struct.Struct('<18h')
+    _IMU_OFFSET = 13
+    # PythonicJoyCon may invert the y and z axis of the left joycon
+    _ime_yz_coeff = 1
 
     vendor_id  : int
     product_id : int
@@ -19,8 +59,12 @@ class JoyCon:
     simple_mode: bool
     color_body : (int, int, int)
     color_btn  : (int, int, int)
+    report_history: Optional[ReportRingBuffer]
+    stats      : Optional[ReportStats]
 
-    def __init__(self, vendor_id: int, product_id: int, serial: str = None, simple_mode=False):
+    def __init__(self, vendor_id: int, product_id: int, serial: str = None, simple_mode=False,
+                 history: int = 0, threaded=True, calibration_cache=None, transport=None,
+                 stats=False, imu=True, shared_memory=None):
         if vendor_id != JOYCON_VENDOR_ID:
             raise ValueError(f'vendor_id is invalid: {vendor_id!r}')
 
@@ -30,104 +74,294 @@ class JoyCon:
         self.vendor_id   = vendor_id
         self.product_id  = product_id
         self.serial      = serial
-        self.simple_mode = simple_mode  # TODO: It's for reporting mode 0x3f
+        # simple HID mode: 0x3f reports, sent on change, without sticks and IMU
+        self.simple_mode = simple_mode
+        self.imu_enabled = imu and not simple_mode
 
         # setup internal state
         self._input_hooks = []
         self._input_report = bytes(self._INPUT_REPORT_SIZE)
-        self._packet_number = 0
+        self._report_seq = -1  # sequence number of self._input_report
+        self._report_time = 0.0
+        # (report, seq, timestamp), published at once for get_state
+        self._report_state = (self._input_report, -1, 0.0)
+        self._stick_hat = 8
+        self.report_history = ReportRingBuffer(history, self._INPUT_REPORT_SIZE) \
+            if history else None
+        self.stats = ReportStats(self._INPUT_REPORT_PERIOD, self._TIMER_PERIOD) \
+            if stats else None
+        self._imu_cache = (None, None)
+        self._imu_calibration = None
+        # the latest state for other processes, see pyjoycon.shm
+        self.shared_memory = None
+        # subcommands awaiting their 0x21 reply, see _send_subcmd
+        self._pending_subcmds = {}
+        # subcommands written without waiting for the reply, by id
+        self._unawaited_subcmds = collections.Counter()
+        self._subcmd_lock = threading.Lock()
+        self._reader_active = False
+        if calibration_cache is True:
+            calibration_cache = CalibrationCache()
+        self._calibration_cache = calibration_cache
+        self._calibration_unverified = False
         self.set_accel_calibration((0, 0, 0), (1, 1, 1))
         self.set_gyro_calibration((0, 0, 0), (1, 1, 1))
+        # the stick tables are built once the calibration is read
+        self._stick_calibration = stick.DEFAULT_STICK_CALIBRATION
+        self._stick_deadzone = stick.DEFAULT_DEADZONE
+        self._stick_outer = stick.DEFAULT_OUTER
 
         # connect to joycon
-        self._joycon_device = self._open(vendor_id, product_id, serial=None)
+        # a pyjoycon.transport.Transport, the real device by default
+        self._joycon_device = transport if transport is not None \
+            else self._open(vendor_id, product_id, serial)
+        # the single writer of output reports, which owns the packet number
+        self._output = OutputWriter(
+            self._joycon_device.write, self._OUTPUT_REPORT_INTERVAL, self._RUMBLE_DATA)
         self._read_joycon_data()
         self._setup_sensors()
-
-        # start talking with the joycon in a daemon thread
-        self._update_input_report_thread \
-            = threading.Thread(target=self._update_input_report)
-        self._update_input_report_thread.setDaemon(True)
-        self._update_input_report_thread.start()
+        if shared_memory:
+            from .shm import SharedStatePublisher
+            self.shared_memory = SharedStatePublisher(
+                None if shared_memory is True else shared_memory)
+
+        # start talking with the joycon in a daemon thread,
+        # unless a JoyConPool is going to read the input reports for us
+        if threaded:
+            self._reader_active = True
+            self._update_input_report_thread \
+                = threading.Thread(target=self._update_input_report)
+            self._update_input_report_thread.setDaemon(True)
+            self._update_input_report_thread.start()
+            self._verify_cached_calibration()
 
     def _open(self, vendor_id, product_id, serial):
-        try:
-            if hasattr(hid, "device"):  # hidapi
-                _joycon_device = hid.device()
-                _joycon_device.open(vendor_id, product_id, serial)
-            elif hasattr(hid, "Device"):  # hid
-                _joycon_device = hid.Device(vendor_id, product_id, serial)
-            else:
-                raise Exception("Implementation of hid is not recognized!")
-        except IOError as e:
-            raise IOError('joycon connect failed') from e
-        return _joycon_device
+        return HidTransport(vendor_id, product_id, serial)
 
     def _close(self):
+        if hasattr(self, "_output"):
+            self._output.close()
+        if getattr(self, "shared_memory", None) is not None:
+            self.shared_memory.close()
         if hasattr(self, "_joycon_device"):
             self._joycon_device.close()
             del self._joycon_device
 
+    def _set_nonblocking(self):
+        self._joycon_device.set_nonblocking(True)
+
     def _read_input_report(self) -> bytes:
         return bytes(self._joycon_device.read(self._INPUT_REPORT_SIZE))
 
-    def _write_output_report(self, command, subcommand, argument):
-        # TODO: add documentation
-        self._joycon_device.write(b''.join([
-            command,
-            self._packet_number.to_bytes(1, byteorder='little'),
-            self._RUMBLE_DATA,
-            subcommand,
-            argument,
-        ]))
-        self._packet_number = (self._packet_number + 1) & 0xF
-
-    def _send_subcmd_get_response(self, subcommand, argument) -> (bool, bytes):
-        # TODO: handle subcmd when daemon is running
-        self._write_output_report(b'\x01', subcommand, argument)
+    def _write_output_report(self, command: int, subcommand: int = None, argument=b'',
+                             key=None) -> Future:
+        """
+        queues an output report for the writer thread, returns a future of
+        the write. A report with a `key` supersedes the waiting one of that key.
+        """
+        return self._output.submit(command, subcommand, argument, key)
 
-        report = self._read_input_report()
-        while report[0] != 0x21:  # TODO, avoid this, await daemon instead
+    @staticmethod
+    def _subcmd_reply_key(subcommand_id, echo):
+        # SPI reads echo their address and size, so they can be told apart
+        return (subcommand_id, bytes(echo[:5]) if subcommand_id == 0x10 else None)
+
+    def _send_subcmd(self, subcommand, argument) -> Future:
+        """
+        sends a subcommand, returns a future of its `(ack, data)` reply.
+
+        While a reader thread (or JoyConPool) is running, it is the only one
+        reading from the device and routes the 0x21 reply to the future.
+        Many subcommands may be in flight at once. Before that, the reply is
+        read here and the future is already resolved when returned.
+        """
+        future = Future()
+        if not self._reader_active:
+            self._output.write_now(0x01, subcommand[0], argument)
             report = self._read_input_report()
+            while report[0] != 0x21 or report[14] != subcommand[0]:
+                report = self._read_input_report()
+            future.set_result((report[13] & 0x80, report[13:]))
+            return future
+
+        key = self._subcmd_reply_key(subcommand[0], argument)
+        coalesce = subcommand[0] if subcommand[0] in self._COALESCED_SUBCMDS else None
+        # register and queue under one lock, so replies arrive in queue order
+        with self._subcmd_lock:
+            queued = self._output.submit(
+                0x01, subcommand[0], argument, key=coalesce, future=future, reply=True)
+            if queued is not future:
+                return queued  # merged into a waiting one, which shares its reply
+            self._pending_subcmds.setdefault(key, collections.deque()).append(future)
+        # a cancelled future stops waiting, a late reply is then discarded
+        future.add_done_callback(
+            lambda future: future.cancelled() and self._forget_subcmd(key, future))
+        return future
+
+    def _forget_subcmd(self, key, future):
+        with self._subcmd_lock:
+            waiting = self._pending_subcmds.get(key)
+            if waiting is None or future not in waiting:
+                return
+            waiting.remove(future)
+            if not waiting:
+                del self._pending_subcmds[key]
 
-        # TODO, remove, see the todo above
-        assert report[1:2] != subcommand, "THREAD carefully"
+    def _send_subcmd_get_response(self, subcommand, argument) -> (bool, bytes):
+        future = self._send_subcmd(subcommand, argument)
+        try:
+            return future.result(self._SUBCMD_TIMEOUT)  # (ack, data)
+        except FutureTimeoutError:
+            future.cancel()  # so a late reply is not mistaken for the next one
+            raise IOError(f"No reply to subcommand {subcommand[0]:#04x}") from None
 
+    def _handle_subcmd_reply(self, report):
         # TODO: determine if the cut bytes are worth anything
-
-        return report[13] & 0x80, report[13:]  # (ack, data)
-
-    def _spi_flash_read(self, address, size) -> bytes:
+        key = self._subcmd_reply_key(report[14], report[15:20])
+        with self._subcmd_lock:
+            waiting = self._pending_subcmds.get(key)
+            while waiting:
+                future = waiting.popleft()
+                # done already if its write failed
+                if not future.done() and future.set_running_or_notify_cancel():
+                    break
+            else:
+                if waiting is not None:
+                    del self._pending_subcmds[key]  # every one of them was cancelled
+                if self._unawaited_subcmds[key[0]]:
+                    self._unawaited_subcmds[key[0]] -= 1  # nobody asked for it
+                elif self.stats is not None:
+                    self.stats.discarded[0x21] += 1
+                return  # nobody is waiting for this reply
+            if not waiting:
+                del self._pending_subcmds[key]
+        future.set_result((report[13] & 0x80, report[13:]))
+
+    def _spi_flash_read_future(self, address, size) -> Future:
         assert size <= 0x1d
         argument = address.to_bytes(4, "little") + size.to_bytes(1, "little")
-        ack, report = self._send_subcmd_get_response(b'\x10', argument)
-        if not ack:
-            raise IOError("After SPI read @ {address:#06x}: got NACK")
+        result = Future()
+
+        def on_reply(reply):
+            if not result.set_running_or_notify_cancel():
+                return  # given up on
+            try:
+                ack, report = reply.result()
+                if not ack:
+                    raise IOError(f"After SPI read @ {address:#06x}: got NACK")
+                if report[:2] != b'\x90\x10':
+                    raise IOError("Something else than the expected ACK was recieved!")
+                if report[2:7] != argument:
+                    raise IOError(f"SPI read @ {address:#06x}: reply is for another read")
+            except BaseException as e:
+                result.set_exception(e)
+            else:
+                result.set_result(report[7:size+7])
 
-        if report[:2] != b'\x90\x10':
-            raise IOError("Something else than the expected ACK was recieved!")
-        assert report[2:7] == argument, (report[2:5], argument)
+        subcmd = self._send_subcmd(b'\x10', argument)
+        # cancelling the read cancels the subcommand, unless the reply is in
+        result.add_done_callback(lambda result: result.cancelled() and subcmd.cancel())
+        subcmd.add_done_callback(on_reply)
+        return result
 
-        return report[7:size+7]
+    def _spi_flash_read(self, address, size) -> bytes:
+        future = self._spi_flash_read_future(address, size)
+        try:
+            return future.result(self._SUBCMD_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            raise IOError(f"No reply to SPI read @ {address:#06x}") from None
 
     def _update_input_report(self):  # daemon thread
         while True:
-            report = self._read_input_report()
-            # TODO, handle input reports of type 0x21 and 0x3f
-            while report[0] != 0x30:
+            try:
                 report = self._read_input_report()
-
-            self._input_report = report
-
+            except (IOError, OSError, ValueError, AttributeError):
+                if hasattr(self, "_joycon_device"):
+                    raise
+                return  # the device was closed
+
+            self._handle_report(report, time.monotonic())
+
+    def _handle_report(self, report, timestamp):
+        if not report:
+            return
+        if report[0] == 0x30:
+            if self.stats is not None:
+                self.stats.report(report, timestamp)
+            self._handle_input_report(report, timestamp)
+        elif report[0] == 0x21:
+            self._handle_subcmd_reply(report)
+        elif report[0] == 0x3f:
+            if self.stats is not None:
+                self.stats.report(report, timestamp)
+            self._handle_input_report(self._translate_simple_report(report), timestamp)
+        elif self.stats is not None:
+            self.stats.discarded[report[0]] += 1
+
+    def _translate_simple_report(self, report) -> bytes:
+        """
+        returns a 0x3f report translated to a 0x30 report, so the usual
+        getters work. The sticks read centered and the IMU samples zero, the
+        battery is kept from the previous report. The stick direction is
+        `get_stick_hat()`.
+        """
+        byte1, byte2 = _SIMPLE_BUTTON_TABLES[self.product_id]
+        buttons = byte1[report[1]] | byte2[report[2]]
+        self._stick_hat = report[3]
+        previous = self._input_report
+        return b''.join([
+            b'\x30\x00', previous[2:3], buttons.to_bytes(3, 'little'),
+            b'\x00\x08\x80\x00\x08\x80', bytes(self._INPUT_REPORT_SIZE - 12),
+        ])
+
+    def _handle_input_report(self, report, timestamp):
+        if self.report_history is not None:
+            self.report_history.append(report, timestamp)
+
+        stats = self.stats
+
+        seq = self._report_seq + 1
+        self._report_time = timestamp
+        self._report_seq = seq
+        self._input_report = report
+        self._report_state = (report, seq, timestamp)
+
+        if stats is None:
             for callback in self._input_hooks:
                 callback(self)
+        else:
+            stats.run_hooks(self, self._input_hooks, timestamp)
+
+        if self.shared_memory is not None:
+            self.shared_memory.publish(self)
 
     def _read_joycon_data(self):
+        cache = self._calibration_cache
+        data = cache.get(self.serial) if cache is not None else None
+        if data is None:
+            data = self._read_spi_calibration_data()
+            if cache is not None:
+                cache.put(self.serial, data)
+        else:
+            # re-read the flash once the reader runs, in case it changed
+            self._calibration_unverified = True
+        self._apply_calibration_data(data)
+
+    def _read_spi_calibration_data(self) -> dict:
+        """returns the raw SPI flash data used by _apply_calibration_data"""
         color_data = self._spi_flash_read(0x6050, 6)
 
-        # TODO: use this
-        # stick_cal_addr = 0x8012 if self.is_left else 0x801D
-        # stick_cal  = self._spi_flash_read(stick_cal_addr, 8)
+        # user stick data, behind its magic, else factory stick data
+        user_stick_cal = self._spi_flash_read(
+            stick.USER_STICK_CAL_L if self.is_left() else stick.USER_STICK_CAL_R,
+            2 + stick.STICK_CAL_SIZE)
+        if user_stick_cal[:2] == stick.USER_CAL_MAGIC:
+            stick_cal = user_stick_cal[2:]
+        else:
+            stick_cal = self._spi_flash_read(
+                stick.FACTORY_STICK_CAL_L if self.is_left() else stick.FACTORY_STICK_CAL_R,
+                stick.STICK_CAL_SIZE)
 
         # user IME data
         if self._spi_flash_read(0x8026, 2) == b"\xB2\xA1":
@@ -139,9 +373,19 @@ class JoyCon:
             # print(f"Calibrate {self.serial} IME with factory data")
             imu_cal = self._spi_flash_read(0x6020, 24)
 
+        return {"color": color_data, "imu_cal": imu_cal, "stick_cal": stick_cal}
+
+    def _apply_calibration_data(self, data: dict):
+        self._calibration_data = data
+        color_data = data["color"]
+        imu_cal = data["imu_cal"]
+
         self.color_body = tuple(color_data[:3])
         self.color_btn  = tuple(color_data[3:])
 
+        self.set_stick_calibration(*stick.parse_stick_calibration(
+            data["stick_cal"], self.is_left()))
+
         self.set_accel_calibration((
                 self._to_int16le_from_2bytes(imu_cal[ 0], imu_cal[ 1]),
                 self._to_int16le_from_2bytes(imu_cal[ 2], imu_cal[ 3]),
@@ -163,13 +407,32 @@ class JoyCon:
             )
         )
 
+    def _verify_cached_calibration(self):
+        """re-reads cached calibration data in a background thread"""
+        if not self._calibration_unverified:
+            return
+        self._calibration_unverified = False
+
+        def verify():
+            try:
+                data = self._read_spi_calibration_data()
+            except IOError:
+                return  # try again on the next connect
+            if data != self._calibration_cache.get(self.serial):
+                self._calibration_cache.put(self.serial, data)
+                self._apply_calibration_data(data)
+
+        threading.Thread(target=verify, daemon=True).start()
+
     def _setup_sensors(self):
-        # Enable 6 axis sensors
-        self._write_output_report(b'\x01', b'\x40', b'\x01')
+        # the replies are left to the reader, which doesn't count them as discarded
+        self._unawaited_subcmds.update((0x40, 0x03))
+        # Enable or disable 6 axis sensors
+        self._output.write_now(0x01, 0x40, b'\x01' if self.imu_enabled else b'\x00')
         # It needs delta time to update the setting
         time.sleep(0.02)
         # Change format of input report
-        self._write_output_report(b'\x01', b'\x03', b'\x30')
+        self._output.write_now(0x01, 0x03, b'\x3f' if self.simple_mode else b'\x30')
 
     @staticmethod
     def _to_int16le_from_2bytes(hbytebe, lbytebe):
@@ -194,6 +457,8 @@ class JoyCon:
             self._GYRO_COEFF_X = 0x343b / cx if cx != 0x343b else 1
             self._GYRO_COEFF_Y = 0x343b / cy if cy != 0x343b else 1
             self._GYRO_COEFF_Z = 0x343b / cz if cz != 0x343b else 1
+        self._imu_cache = (None, None)
+        self._imu_calibration = None
 
     def set_accel_calibration(self, offset_xyz=None, coeff_xyz=None):
         if offset_xyz:
@@ -205,11 +470,72 @@ class JoyCon:
             self._ACCEL_COEFF_X = 0x4000 / cx if cx != 0x4000 else 1
             self._ACCEL_COEFF_Y = 0x4000 / cy if cy != 0x4000 else 1
             self._ACCEL_COEFF_Z = 0x4000 / cz if cz != 0x4000 else 1
-
-    def register_update_hook(self, callback):
-        self._input_hooks.append(callback)
+        self._imu_cache = (None, None)
+        self._imu_calibration = None
+
+    def set_stick_calibration(self, center_xy=None, below_xy=None, above_xy=None,
+                              deadzone: float = None, outer: float = None):
+        """
+        sets the calibration of the stick of this joycon, and rebuilds the
+        lookup tables of the calibrated stick getters.
+
+        arg: center_xy : the raw (horizontal, vertical) values at rest
+        arg: below_xy  : how far each axis reaches below its center
+        arg: above_xy  : how far each axis reaches above its center
+        arg: deadzone  : the fraction of the range around the center which reads 0
+        arg: outer     : the fraction of the range from which on an axis reads -1 or 1
+
+        Arguments left out keep their current value.
+        """
+        center, below, above = self._stick_calibration
+        center, below, above = center_xy or center, below_xy or below, above_xy or above
+        deadzone = self._stick_deadzone if deadzone is None else deadzone
+        outer = self._stick_outer if outer is None else outer
+        tables = tuple(
+            stick.axis_table(c, b, a, deadzone, outer)
+            for c, b, a in zip(center, below, above))
+        self._stick_calibration = (tuple(center), tuple(below), tuple(above))
+        self._stick_deadzone, self._stick_outer = deadzone, outer
+        # (left x, left y, right x, right y), one assignment for the reader thread
+        zero = stick.ZERO_TABLE
+        self._stick_tables = tables + (zero, zero) if self.is_left() else (zero, zero) + tables
+
+    def get_stick_tables(self) -> tuple:
+        """
+        returns the lookup tables of the calibrated sticks, as
+        (left horizontal, left vertical, right horizontal, right vertical),
+        each a tuple of 4096 floats indexed by the raw value.
+        The stick this joycon doesn't have reads 0.
+        """
+        return self._stick_tables
+
+    def register_update_hook(self, callback=None, every: int = 1, max_rate: float = None,
+                             fields=None):
+        """
+        calls `callback(joycon)` on the reader thread for new input reports.
+
+        By default that is every report, ~66 Hz. `every`, `max_rate` and
+        `fields` select fewer, see `pyjoycon.hooks.filter_hook`:
+
+            @joycon.register_update_hook(max_rate=10, fields=("buttons",))
+            def on_buttons(joycon): ...
+        """
+        if callback is None:  # used as a decorator with arguments
+            return lambda callback: self.register_update_hook(
+                callback, every=every, max_rate=max_rate, fields=fields)
+        self._input_hooks.append(filter_hook(callback, every, max_rate, fields))
         return callback  # this makes it so you could use it as a decorator
 
+    def unregister_update_hook(self, callback):
+        for hook in self._input_hooks:
+            if hook == callback or getattr(hook, "__wrapped__", None) == callback:
+                break
+        else:
+            raise ValueError(f"{callback!r} is not registered")
+        self._input_hooks.remove(hook)
+        if self.stats is not None:
+            self.stats.forget_hook(hook)
+
     def is_left(self):
         return self.product_id == JOYCON_L_PRODUCT_ID
 
@@ -222,6 +548,11 @@ class JoyCon:
     def get_battery_level(self):
         return self._get_nbit_from_input_report(2, 5, 3)
 
+    def get_buttons(self) -> int:
+        """returns the buttons as one 24 bit mask, see constants.BUTTON_BITS"""
+        report = self._input_report
+        return report[3] | report[4] << 8 | report[5] << 16
+
     def get_button_y(self):
         return self._get_nbit_from_input_report(3, 0, 1)
 
@@ -291,6 +622,14 @@ class JoyCon:
     def get_button_zl(self):
         return self._get_nbit_from_input_report(5, 7, 1)
 
+    def get_stick_hat(self) -> int:
+        """
+        returns the stick direction of simple mode reports, 0 to 7 clockwise
+        from up with the joycon held sideways, 8 when centered.
+        See constants.HAT_DIRECTIONS.
+        """
+        return self._stick_hat
+
     def get_stick_left_horizontal(self):
         return self._get_nbit_from_input_report(6, 0, 8) \
             | (self._get_nbit_from_input_report(7, 0, 4) << 8)
@@ -307,6 +646,18 @@ class JoyCon:
         return self._get_nbit_from_input_report(10, 4, 4) \
             | (self._get_nbit_from_input_report(11, 0, 8) << 4)
 
+    def get_stick_left_calibrated(self) -> (float, float):
+        """returns the left stick as (horizontal, vertical) in [-1, 1], see set_stick_calibration"""
+        report = self._input_report
+        tx, ty, _, _ = self._stick_tables
+        return tx[report[6] | (report[7] & 0xF) << 8], ty[report[7] >> 4 | report[8] << 4]
+
+    def get_stick_right_calibrated(self) -> (float, float):
+        """returns the right stick as (horizontal, vertical) in [-1, 1], see set_stick_calibration"""
+        report = self._input_report
+        _, _, tx, ty = self._stick_tables
+        return tx[report[9] | (report[10] & 0xF) << 8], ty[report[10] >> 4 | report[11] << 4]
+
     def get_accel_x(self, sample_idx=0):
         if sample_idx not in (0, 1, 2):
             raise IndexError('sample_idx should be between 0 and 2')
@@ -355,82 +706,105 @@ class JoyCon:
             self._input_report[24 + sample_idx * 12])
         return (data - self._GYRO_OFFSET_Z) * self._GYRO_COEFF_Z
 
+    def get_imu_samples(self):
+        """
+        returns the three calibrated IMU samples of the current input report
+        as a tuple of `(accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z)`
+        tuples, with `_ime_yz_coeff` applied to the y and z axis.
+
+        The samples are decoded in one pass and cached until the next report.
+        """
+        report = self._input_report
+        cached_report, samples = self._imu_cache
+        if cached_report is report:
+            return samples
+
+        c = self._ime_yz_coeff
+        aox, aoy, aoz = self._ACCEL_OFFSET_X, self._ACCEL_OFFSET_Y, self._ACCEL_OFFSET_Z
+        gox, goy, goz = self._GYRO_OFFSET_X, self._GYRO_OFFSET_Y, self._GYRO_OFFSET_Z
+        acx = self._ACCEL_COEFF_X
+        acy = self._ACCEL_COEFF_Y * c
+        acz = self._ACCEL_COEFF_Z * c
+        gcx = self._GYRO_COEFF_X
+        gcy = self._GYRO_COEFF_Y * c
+        gcz = self._GYRO_COEFF_Z * c
+
+        raw = self._IMU_STRUCT.unpack_from(report, self._IMU_OFFSET)
+        samples = tuple(
+            (
+                (raw[i] - aox) * acx,
+                (raw[i + 1] - aoy) * acy,
+                (raw[i + 2] - aoz) * acz,
+                (raw[i + 3] - gox) * gcx,
+                (raw[i + 4] - goy) * gcy,
+                (raw[i + 5] - goz) * gcz,
+            )
+            for i in (0, 6, 12)
+        )
+
+        # store as one tuple, so the reader thread never sees a torn cache
+        self._imu_cache = (report, samples)
+        return samples
+
+    def get_state(self) -> JoyConState:
+        """
+        returns an immutable snapshot of the current input report. Unlike
+        calling the getters one by one, every value of the snapshot comes
+        from the same report.
+        """
+        report, seq, timestamp = self._report_state
+        return JoyConState(report, seq, timestamp, self._get_imu_calibration())
+
+    def _get_imu_calibration(self) -> tuple:
+        # the calibration of JoyConState, rebuilt after it changed
+        calibration = self._imu_calibration
+        if calibration is None:
+            calibration = self._imu_calibration = (
+                self._ACCEL_OFFSET_X, self._ACCEL_OFFSET_Y, self._ACCEL_OFFSET_Z,
+                self._GYRO_OFFSET_X, self._GYRO_OFFSET_Y, self._GYRO_OFFSET_Z,
+                self._ACCEL_COEFF_X, self._ACCEL_COEFF_Y, self._ACCEL_COEFF_Z,
+                self._GYRO_COEFF_X, self._GYRO_COEFF_Y, self._GYRO_COEFF_Z,
+            )
+        return calibration
+
     def get_status(self) -> dict:
-        return {
-            "battery": {
-                "charging": self.get_battery_charging(),
-                "level": self.get_battery_level(),
-            },
-            "buttons": {
-                "right": {
-                    "y": self.get_button_y(),
-                    "x": self.get_button_x(),
-                    "b": self.get_button_b(),
-                    "a": self.get_button_a(),
-                    "sr": self.get_button_right_sr(),
-                    "sl": self.get_button_right_sl(),
-                    "r": self.get_button_r(),
-                    "zr": self.get_button_zr(),
-                },
-                "shared": {
-                    "minus": self.get_button_minus(),
-                    "plus": self.get_button_plus(),
-                    "r-stick": self.get_button_r_stick(),
-                    "l-stick": self.get_button_l_stick(),
-                    "home": self.get_button_home(),
-                    "capture": self.get_button_capture(),
-                    "charging-grip": self.get_button_charging_grip(),
-                },
-                "left": {
-                    "down": self.get_button_down(),
-                    "up": self.get_button_up(),
-                    "right": self.get_button_right(),
-                    "left": self.get_button_left(),
-                    "sr": self.get_button_left_sr(),
-                    "sl": self.get_button_left_sl(),
-                    "l": self.get_button_l(),
-                    "zl": self.get_button_zl(),
-                }
-            },
-            "analog-sticks": {
-                "left": {
-                    "horizontal": self.get_stick_left_horizontal(),
-                    "vertical": self.get_stick_left_vertical(),
-                },
-                "right": {
-                    "horizontal": self.get_stick_right_horizontal(),
-                    "vertical": self.get_stick_right_vertical(),
-                },
-            },
-            "accel": {
-                "x": self.get_accel_x(),
-                "y": self.get_accel_y(),
-                "z": self.get_accel_z(),
-            },
-            "gyro": {
-                "x": self.get_gyro_x(),
-                "y": self.get_gyro_y(),
-                "z": self.get_gyro_z(),
-            },
-        }
-
-    def set_player_lamp_on(self, on_pattern: int):
-        self._write_output_report(
-            b'\x01', b'\x30',
+        return self.get_state().to_dict()
+
+    def set_player_lamp_on(self, on_pattern: int) -> Future:
+        return self._send_subcmd(
+            b'\x30',
             (on_pattern & 0xF).to_bytes(1, byteorder='little'))
 
-    def set_player_lamp_flashing(self, flashing_pattern: int):
-        self._write_output_report(
-            b'\x01', b'\x30',
+    def set_player_lamp_flashing(self, flashing_pattern: int) -> Future:
+        return self._send_subcmd(
+            b'\x30',
             ((flashing_pattern & 0xF) << 4).to_bytes(1, byteorder='little'))
 
-    def set_player_lamp(self, pattern: int):
-        self._write_output_report(
-            b'\x01', b'\x30',
+    def set_player_lamp(self, pattern: int) -> Future:
+        return self._send_subcmd(
+            b'\x30',
             pattern.to_bytes(1, byteorder='little'))
 
-    def disconnect_device(self):
-        self._write_output_report(b'\x01', b'\x06', b'\x00')
+    def enable_vibration(self, enable: bool = True) -> Future:
+        return self._send_subcmd(b'\x48', b'\x01' if enable else b'\x00')
+
+    def send_rumble(self, data: bytes):
+        """
+        sets the rumble, 8 bytes of `pyjoycon.rumble.rumble_data`, or the
+        4 bytes of `encode_rumble` for both actuators. It is sent in a
+        rumble-only report, and with every later output report.
+        Needs `enable_vibration()` first. Rumble changes coming faster than
+        the controller takes them are coalesced, the latest one is sent.
+        """
+        if len(data) == 4:
+            data = data * 2
+        elif len(data) != 8:
+            raise ValueError(f'rumble data must be 4 or 8 bytes, not {len(data)}')
+        self._output.rumble = bytes(data)
+        self._output.submit(0x10, key="rumble", future=False)
+
+    def disconnect_device(self) -> Future:
+        return self._write_output_report(0x01, 0x06, b'\x00')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+"""
+The output reports of JoyCons, each written by a single writer.
+
+Callers queue reports on the `OutputWriter` of a device and get a future.
+One shared output thread, started on the first report, writes the queued
+reports of every device from its preallocated buffer. It is the only one
+to touch a device's packet number, so reports queued from many threads
+can't mix it up, and a burst of reports for many devices costs one wakeup.
+"""
+from concurrent.futures import Future
+import collections
+import logging
+import threading
+import time
+
+OUTPUT_REPORT_SIZE = 49
+# how long close() waits for the queued reports to be written, in seconds
+CLOSE_TIMEOUT = 1.0
+_log = logging.getLogger(__name__)
+_ZEROS = bytes(OUTPUT_REPORT_SIZE - 10)
+
+
+class _Pending:
+    __slots__ = ("command", "subcommand", "argument", "key", "future", "reply")
+
+    def __init__(self, command, subcommand, argument, key, future, reply):
+        self.command = command
+        self.subcommand = subcommand
+        self.argument = argument
+        self.key = key
+        self.future = future
+        self.reply = reply
+
+
+class _OutputThread:
+    """The thread writing the queued reports of every OutputWriter."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._scheduled = []  # writers which got a report since the last pass
+        self.thread = threading.Thread(target=self._run, name="JoyConOutput", daemon=True)
+        self.thread.start()
+
+    def schedule(self, writer=None):
+        """hands over a writer with a first queued report, or just wakes up the thread"""
+        with self._cond:
+            if writer is not None:
+                self._scheduled.append(writer)
+            self._cond.notify()
+
+    def _run(self):
+        ready = []  # writers with queued reports
+        wakeup = None
+        while True:
+            with self._cond:
+                if not self._scheduled:
+                    self._cond.wait(None if wakeup is None else max(0.0, wakeup - time.monotonic()))
+                ready += self._scheduled
+                self._scheduled = []
+
+            now = time.monotonic()
+            waiting = []
+            wakeup = None
+            for writer in ready:
+                due = writer._last_write + writer.min_interval
+                if due <= now or not writer._running:
+                    if not writer._write_next():
+                        continue
+                    due = writer._last_write + writer.min_interval
+                waiting.append(writer)
+                wakeup = due if wakeup is None else min(wakeup, due)
+            ready = waiting
+
+
+_output_thread = None
+_output_thread_lock = threading.Lock()
+
+
+def _get_output_thread():
+    global _output_thread
+    with _output_thread_lock:
+        if _output_thread is None:
+            _output_thread = _OutputThread()
+        return _output_thread
+
+
+class OutputWriter:
+    """
+    The queue of output reports of one device, written at most every
+    `min_interval` seconds, the rate the controller takes them at.
+
+    A report queued with a `key` supersedes the report of that key which
+    is still waiting, taking its place in the queue, so 50 lamp changes
+    within one interval become one write. `rumble` is the rumble data sent
+    with every report.
+    """
+
+    def __init__(self, write, min_interval: float, rumble: bytes):
+        self.min_interval = min_interval
+        self.rumble = rumble
+        self.reports_written = 0
+        self.coalesced = 0
+        self._write = write
+        self._buffer = bytearray(OUTPUT_REPORT_SIZE)
+        self._packet_number = 0
+        self._last_write = float("-inf")
+        self._queue = collections.deque()
+        self._keyed = {}  # the waiting report of each key
+        self._cond = threading.Condition(threading.Lock())
+        self._write_lock = threading.Lock()
+        self._scheduled = False  # whether the output thread knows of our queue
+        self._running = True
+
+    def __len__(self):
+        return len(self._queue)
+
+    def submit(self, command: int, subcommand: int = None, argument: bytes = b"",
+               key=None, future: Future = None, reply=False) -> Future:
+        """
+        queues a report, returns the future of its write: `future`, a new
+        one, or that of the waiting report of `key` it was merged into.
+        With `future=False` the report goes without one, and None is returned.
+
+        With `reply`, the future stands for the reply to a subcommand and
+        is left for the reader to resolve, unless the write fails.
+        """
+        with self._cond:
+            if not self._running:
+                raise IOError("the output writer is closed")
+            if key is not None:
+                pending = self._keyed.get(key)
+                if pending is not None:
+                    pending.argument = argument
+                    self.coalesced += 1
+                    return pending.future
+            if future is None:
+                future = Future()
+            elif future is False:
+                future = None
+            pending = _Pending(command, subcommand, argument, key, future, reply)
+            self._queue.append(pending)
+            if key is not None:
+                self._keyed[key] = pending
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            _get_output_thread().schedule(self)
+        return pending.future
+
+    def write_now(self, command: int, subcommand: int = None, argument: bytes = b""):
+        """writes a report on the calling thread, for the connect sequence"""
+        with self._write_lock:
+            self._write_report(command, subcommand, argument)
+
+    def _write_report(self, command, subcommand, argument):
+        # holds _write_lock, the only code touching the buffer and the packet number
+        buffer = self._buffer
+        buffer[0] = command
+        buffer[1] = self._packet_number
+        buffer[2:10] = self.rumble
+        buffer[10:] = _ZEROS
+        if subcommand is not None:
+            buffer[10] = subcommand
+            buffer[11:11 + len(argument)] = argument
+        self._packet_number = (self._packet_number + 1) & 0xF
+        self._last_write = time.monotonic()
+        self._write(buffer)
+        self.reports_written += 1
+
+    def _write_next(self) -> bool:  # output thread
+        # writes the oldest report, returns whether more are queued
+        with self._cond:
+            if not self._queue:  # cancelled by close()
+                self._scheduled = False
+                return False
+            pending = self._queue.popleft()
+            if pending.key is not None:
+                del self._keyed[pending.key]
+
+        # any exception fails this report only, the thread writes for every device
+        future = pending.future
+        if future is None:
+            try:
+                with self._write_lock:
+                    self._write_report(pending.command, pending.subcommand, pending.argument)
+            except (IOError, OSError, ValueError):
+                pass  # nobody to tell, the reader finds out about a lost device
+            except Exception:
+                _log.exception("writing an output report failed")
+        # a cancelled report is dropped, a started write can't be cancelled
+        elif not (future.cancelled() if pending.reply else not future.set_running_or_notify_cancel()):
+            try:
+                with self._write_lock:
+                    self._write_report(pending.command, pending.subcommand, pending.argument)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not pending.reply:
+                    future.set_result(None)
+
+        with self._cond:
+            if self._queue:
+                return True
+            self._scheduled = False
+            if not self._running:
+                self._cond.notify_all()  # for close()
+            return False
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """
+        stops taking reports, and waits up to `timeout` seconds until the
+        queued ones are written. The reports still queued then are cancelled.
+        """
+        with self._cond:
+            self._running = False
+            if self._scheduled:
+                _get_output_thread().schedule()  # to write the rest without pacing
+            if _output_thread is not None and threading.current_thread() is _output_thread.thread:
+                return  # they are written once we return
+            if self._cond.wait_for(lambda: not self._queue, timeout):
+                return
+            # the device stopped taking reports, or the output thread is stuck
+            cancelled, self._queue = self._queue, collections.deque()
+            self._keyed.clear()
+        for pending in cancelled:
+            if pending.future is not None:
+                pending.future.cancel()
@@ -0,0 +1,217 @@
+"""
+A left and a right JoyCon as one controller, see `JoyConPair`.
+
+Both JoyCons stream on their own clocks, and their reports reach the host
+with some jitter. Each report is placed on the host clock through its timer
+byte, which counts 5 ms ticks on the device: the device time it gives,
+plus the smallest delay seen from device to host. That removes the read
+jitter, so reports from both sides can be lined up within a timer tick.
+"""
+from .constants import BUTTON_BITS
+from .joycon import JoyCon
+from .state import JoyConState
+from collections import namedtuple
+import threading
+
+# after the timer byte may have wrapped around, trust the host clock instead
+_TIMER_WRAP = 0.5 * 0x100 * JoyCon._TIMER_PERIOD
+# how fast, in seconds per report, the device to host delay may grow again
+_DELAY_CREEP = 0.0001
+
+
+class JoyConPairState(namedtuple("JoyConPairState", ["left", "right", "seq", "timestamp", "skew"])):
+    """
+    The state of a JoyConPair as of one frame.
+
+        left, right : the JoyConState of each side
+        seq         : the number of the frame
+        timestamp   : the time of the newer of the two reports, on the common clock
+        skew        : how much newer the right report is than the left one,
+                      in seconds, from the timer bytes
+
+    The buttons, sticks and IMU values are taken from the side they belong to.
+    """
+    __slots__ = ()
+
+    @property
+    def buttons(self) -> int:
+        """the buttons of both sides as one 24 bit mask, see constants.BUTTON_BITS"""
+        return self.left.buttons | self.right.buttons
+
+    def pressed(self, button: str) -> int:
+        """returns 1 if `button`, a name of constants.BUTTON_BITS, is pressed"""
+        return self.buttons >> BUTTON_BITS[button] & 1
+
+    @property
+    def stick_l(self) -> (int, int):
+        return self.left.stick_l
+
+    @property
+    def stick_r(self) -> (int, int):
+        return self.right.stick_r
+
+
+class _Side:
+    """The latest report of one JoyCon of a pair, on the aligned clock."""
+
+    __slots__ = ("joycon", "report", "seq", "time", "fresh",
+                 "last_timer", "last_host", "device_time", "delay")
+
+    def __init__(self, joycon):
+        self.joycon = joycon
+        self.report = joycon._input_report
+        self.seq = -1
+        self.time = 0.0
+        self.fresh = False  # reported since the last frame
+        self.last_timer = None
+        self.last_host = 0.0
+        self.device_time = 0.0
+        self.delay = 0.0  # the smallest device to host delay seen, give or take drift
+
+    def update(self, joycon):  # reader thread
+        report, seq, host = joycon._report_state
+        if joycon.simple_mode:
+            aligned = host  # simple mode reports have no timer
+        elif self.last_timer is None or host - self.last_host > _TIMER_WRAP:
+            self.device_time = 0.0
+            self.delay = host
+            aligned = host
+        else:
+            self.device_time += ((report[1] - self.last_timer) & 0xFF) * JoyCon._TIMER_PERIOD
+            delay = host - self.device_time
+            self.delay = min(self.delay + _DELAY_CREEP, delay)
+            aligned = self.device_time + self.delay
+        self.last_timer = report[1]
+        self.last_host = host
+        self.report, self.seq, self.time = report, seq, aligned
+        self.fresh = True
+
+
+class JoyConPair:
+    """
+    A left and a right JoyCon as one controller.
+
+        pair = JoyConPair.open()  # both read by one thread
+        pair = JoyConPair(left, right)  # or two connected JoyCons
+
+        @pair.register_update_hook
+        def on_frame(pair):
+            state = pair.get_state()
+            print(state.buttons, state.stick_l, state.stick_r, state.skew)
+
+    Each report of either side is placed on a common clock by its timer
+    byte. Once both sides reported, they make up one frame: a
+    `JoyConPairState` is published, and the pair's update hooks run once,
+    at ~66 Hz like a single JoyCon. A side that reports twice before the
+    other one does makes a frame on its own, with the last report of the
+    other side, so a lost report doesn't stall the pair.
+
+    Hooks run on the reader thread which completed the frame, one frame at
+    a time. Use `get_state()` for a snapshot of both sides from the same
+    frame, its timestamps are on the common clock.
+    """
+
+    def __init__(self, left, right):
+        if not left.is_left():
+            raise ValueError(f'left is not a left JoyCon: {left!r}')
+        if not right.is_right():
+            raise ValueError(f'right is not a right JoyCon: {right!r}')
+        self.left = left
+        self.right = right
+        self.frames = 0
+        self._hooks = []
+        self._owned = ()  # what open() created, closed with the pair
+        self._lock = threading.RLock()
+        self._left = _Side(left)
+        self._right = _Side(right)
+        self._state = self._make_state(-1, 0.0)
+        left.register_update_hook(self._on_left_report)
+        right.register_update_hook(self._on_right_report)
+
+    @classmethod
+    def open(cls, left_id=None, right_id=None, joycon_cls=JoyCon, pool=None, **kw):
+        """
+        connects to a left and a right JoyCon of class `joycon_cls`, the
+        first ones found by default, and returns their pair. Both are read
+        by `pool`, or by a one-thread JoyConPool of their own.
+        """
+        from .device import get_L_id, get_R_id
+        from .pool import JoyConPool
+        owned = []
+        if pool is None:
+            pool = JoyConPool(threads=1)
+            owned.append(pool)
+        try:
+            left = pool.open(*(left_id or get_L_id()), cls=joycon_cls, **kw)
+            owned.append(left)
+            right = pool.open(*(right_id or get_R_id()), cls=joycon_cls, **kw)
+            owned.append(right)
+        except BaseException:
+            cls._close_owned(owned)
+            raise
+        pair = cls(left, right)
+        pair._owned = tuple(owned)
+        return pair
+
+    @staticmethod
+    def _close_owned(owned):
+        for item in reversed(owned):
+            if isinstance(item, JoyCon):
+                item._close()
+            else:
+                item.close()
+
+    def close(self):
+        """stops merging, and closes what `open()` connected"""
+        for joycon, hook in ((self.left, self._on_left_report), (self.right, self._on_right_report)):
+            try:
+                joycon.unregister_update_hook(hook)
+            except ValueError:
+                pass
+        owned, self._owned = self._owned, ()
+        self._close_owned(owned)
+
+    def _make_state(self, seq, timestamp):
+        left, right = self._left, self._right
+        return JoyConPairState(
+            JoyConState(left.report, left.seq, left.time, self.left._get_imu_calibration()),
+            JoyConState(right.report, right.seq, right.time, self.right._get_imu_calibration()),
+            seq, timestamp, right.time - left.time)
+
+    def _on_left_report(self, joycon):  # reader thread
+        self._on_report(self._left, self._right)
+
+    def _on_right_report(self, joycon):  # reader thread
+        self._on_report(self._right, self._left)
+
+    def _on_report(self, side, other):
+        with self._lock:
+            # a second report before the other side's closes the frame without it
+            late = side.fresh
+            side.update(side.joycon)
+            if not (other.fresh or late):
+                return
+            side.fresh = other.fresh = False
+            seq = self.frames
+            self.frames = seq + 1
+            self._state = self._make_state(seq, max(side.time, other.time))
+            for callback in self._hooks:
+                callback(self)
+
+    def get_state(self) -> JoyConPairState:
+        """returns the state of both sides as of the latest frame"""
+        return self._state
+
+    def register_update_hook(self, callback):
+        """calls `callback(pair)` once per frame, see the class docs"""
+        with self._lock:
+            self._hooks = self._hooks + [callback]
+        return callback  # this makes it so you could use it as a decorator
+
+    def unregister_update_hook(self, callback):
+        with self._lock:
+            if callback not in self._hooks:
+                raise ValueError(f"{callback!r} is not registered")
+            hooks = list(self._hooks)
+            hooks.remove(callback)
+            self._hooks = hooks
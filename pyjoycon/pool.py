@@ -0,0 +1,161 @@
+from .joycon import JoyCon
+import logging
+import threading
+import time
+
+_log = logging.getLogger(__name__)
+
+
+class _PoolReader:
+    """One reader thread, servicing a share of the devices in a JoyConPool."""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.joycons = ()  # replaced, never mutated, so the thread can iterate it
+        self.reports = 0
+        self.polls = 0
+        self.idle_polls = 0
+        self.cpu_time = 0.0
+        self.thread = threading.Thread(
+            target=self._run, name=f"JoyConPool-{index}", daemon=True)
+
+    def _run(self):
+        pool = self.pool
+        max_burst = pool.max_burst
+        poll_interval = pool.poll_interval
+        due = {}  # when to poll each joycon next
+        thread_start = time.thread_time()
+        while pool._running:
+            got = 0
+            now = time.monotonic()
+            wakeup = now + JoyCon._INPUT_REPORT_PERIOD
+            for joycon in self.joycons:
+                when = due.get(joycon, now)
+                # keep polling while subcommand replies are outstanding
+                if when > now and not joycon._pending_subcmds:
+                    wakeup = min(wakeup, when)
+                    continue
+
+                # drain what the device has buffered, but don't starve the others
+                read = 0
+                for _ in range(max_burst):
+                    try:
+                        report = joycon._read_input_report()
+                    except (IOError, OSError, ValueError, AttributeError):
+                        pool._on_error(joycon)
+                        break
+                    if not report:
+                        break
+                    read += 1
+                    try:
+                        joycon._handle_report(report, time.monotonic())
+                    except Exception:
+                        # a failing hook must not stop the other devices of the thread
+                        _log.exception("update hook of JoyCon %s failed", joycon.serial)
+
+                if joycon.simple_mode:
+                    # reports come on change only, poll at the usual report rate
+                    when = now + JoyCon._INPUT_REPORT_PERIOD
+                else:
+                    # skip the device until shortly before its next report is due
+                    when = now + (JoyCon._INPUT_REPORT_PERIOD - poll_interval if read else poll_interval)
+                due[joycon] = when
+                wakeup = min(wakeup, when)
+                got += read
+
+            if len(due) > len(self.joycons):
+                due = {joycon: due[joycon] for joycon in self.joycons if joycon in due}
+
+            self.polls += 1
+            self.reports += got
+            self.cpu_time = time.thread_time() - thread_start
+            if not got:
+                self.idle_polls += 1
+            delay = wakeup - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class JoyConPool:
+    """
+    Reads the input reports of many JoyCons on a few shared threads,
+    instead of one thread per JoyCon.
+
+        pool = JoyConPool()
+        joycon = pool.open(*get_R_id(), cls=PythonicJoyCon)
+
+    Devices are put in non-blocking mode and polled round-robin. After a
+    device delivered a report, it is left alone until `poll_interval` seconds
+    before its next report is due, and then polled every `poll_interval`
+    seconds until the report arrives. At most `max_burst` reports are read
+    per device and poll. The reader threads sleep in between.
+    Registered update hooks run on the pool's reader threads. An exception
+    in a hook is logged, and the devices keep being read.
+    """
+
+    def __init__(self, threads: int = 1, poll_interval: float = 0.001, max_burst: int = 4):
+        if threads < 1:
+            raise ValueError(f'threads is invalid: {threads!r}')
+        self.poll_interval = poll_interval
+        self.max_burst = max_burst
+        self._lock = threading.Lock()
+        self._running = True
+        self._readers = [_PoolReader(self, i) for i in range(threads)]
+        for reader in self._readers:
+            reader.thread.start()
+
+    def __len__(self):
+        return sum(len(reader.joycons) for reader in self._readers)
+
+    @property
+    def joycons(self) -> list:
+        return [joycon for reader in self._readers for joycon in reader.joycons]
+
+    def open(self, vendor_id: int, product_id: int, serial: str = None, cls=JoyCon, **kw):
+        """connects to a JoyCon of class `cls` and adds it to the pool"""
+        joycon = cls(vendor_id, product_id, serial, threaded=False, **kw)
+        self.add(joycon)
+        return joycon
+
+    def add(self, joycon):
+        """adds a JoyCon which was created with `threaded=False`"""
+        if getattr(joycon, "_update_input_report_thread", None) is not None:
+            raise ValueError("joycon already has its own reader thread")
+        joycon._set_nonblocking()
+        with self._lock:
+            reader = min(self._readers, key=lambda r: len(r.joycons))
+            reader.joycons = reader.joycons + (joycon,)
+            joycon._reader_active = True
+        joycon._verify_cached_calibration()
+
+    def remove(self, joycon):
+        with self._lock:
+            for reader in self._readers:
+                if joycon in reader.joycons:
+                    reader.joycons = tuple(j for j in reader.joycons if j is not joycon)
+                    joycon._reader_active = False
+
+    def _on_error(self, joycon):  # reader thread
+        # the device is gone or closed, stop polling it
+        self.remove(joycon)
+
+    def close(self):
+        self._running = False
+        for reader in self._readers:
+            if reader.thread is not threading.current_thread():
+                reader.thread.join()
+
+    def stats(self) -> dict:
+        """returns pool-wide counters, summed over all reader threads"""
+        readers = self._readers
+        polls = sum(r.polls for r in readers)
+        reports = sum(r.reports for r in readers)
+        return {
+            "devices": len(self),
+            "threads": len(readers),
+            "reports": reports,
+            "polls": polls,
+            "idle_polls": sum(r.idle_polls for r in readers),
+            "reports_per_poll": reports / polls if polls else 0.0,
+            "cpu_time": sum(r.cpu_time for r in readers),
+        }
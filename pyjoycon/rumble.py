@@ -0,0 +1,234 @@
+"""
+HD rumble: encoding frequencies and amplitudes into the rumble data of
+output reports, and playing waveforms on many JoyCons from one thread.
+
+Each actuator takes 4 bytes, a high band (80 - 1252 Hz) and a low band
+(40 - 626 Hz) frequency, each with an amplitude from 0 to 1. Both are
+encoded on a logarithmic scale. The codes and the values they stand for
+are tabulated once here, so encoding is a few bisections, without any
+logarithms.
+"""
+from .joycon import JoyCon
+from bisect import bisect_right
+from concurrent import futures
+from concurrent.futures import Future
+import threading
+import time
+
+# 320 Hz and 160 Hz, both silent, like JoyCon._RUMBLE_DATA
+NEUTRAL = b'\x00\x01\x40\x40'
+
+# raised when resolving a future the caller cancelled, Python 3.8 on
+_InvalidStateError = getattr(futures, "InvalidStateError", ())
+
+# the frequency codes of each band, f = 10 * 2 ** (code / 32)
+_HIGH_CODES = range(0x60, 0xE0)
+_LOW_CODES = range(0x40, 0xC0)
+
+
+def _amplitude(code):
+    # the amplitude a code stands for, three logarithmic ranges
+    if code == 0:
+        return 0.0
+    if code < 16:
+        return 0.01 * 2 ** ((code - 1) / 4)
+    if code < 32:
+        return 2 ** (code / 16) / 17
+    return 2 ** (code / 32) / 8.7
+
+
+def _bounds(values):
+    # the geometric midpoints between neighbouring values, for bisect
+    return [(a * b) ** 0.5 for a, b in zip(values, values[1:])]
+
+
+HIGH_FREQUENCIES = [10 * 2 ** (code / 32) for code in _HIGH_CODES]
+LOW_FREQUENCIES = [10 * 2 ** (code / 32) for code in _LOW_CODES]
+AMPLITUDES = [_amplitude(code) for code in range(101)]
+
+_HIGH_BOUNDS = _bounds(HIGH_FREQUENCIES)
+_LOW_BOUNDS = _bounds(LOW_FREQUENCIES)
+# code 0 is silence, code 1 starts half a step below its amplitude
+_AMP_BOUNDS = [AMPLITUDES[1] * 2 ** -0.125] + _bounds(AMPLITUDES[1:])
+
+
+def encode_rumble(high_freq: float = 320.0, high_amp: float = 0.0,
+                  low_freq: float = 160.0, low_amp: float = 0.0) -> bytes:
+    """
+    returns the 4 bytes of one actuator. Frequencies are in Hz and
+    amplitudes from 0 to 1, values out of range are clamped.
+    """
+    hf = bisect_right(_HIGH_BOUNDS, high_freq) * 4
+    lf = bisect_right(_LOW_BOUNDS, low_freq)
+    ha = bisect_right(_AMP_BOUNDS, high_amp)
+    la = bisect_right(_AMP_BOUNDS, low_amp)
+    return bytes((
+        hf & 0xFF,
+        ha * 2 + (hf >> 8),
+        lf | (la & 1) << 7,
+        (la >> 1) + 0x40,
+    ))
+
+
+def rumble_data(left: bytes = NEUTRAL, right: bytes = None) -> bytes:
+    """
+    returns the 8 bytes of rumble data of an output report, the actuators
+    of the left and the right joycon. `right` is like `left` if left out.
+    A single joycon only uses its own half.
+    """
+    if len(left) != 4 or right is not None and len(right) != 4:
+        raise ValueError("an actuator takes 4 bytes, see encode_rumble")
+    return left + (left if right is None else right)
+
+
+def encode_waveform(frames) -> list:
+    """
+    returns the rumble data of every frame of a waveform, for
+    `RumbleScheduler.play`. Each frame is a
+    `(high_freq, high_amp, low_freq, low_amp)` tuple, or None for silence.
+    Identical frames are encoded once and share their bytes.
+    """
+    encoded = {None: rumble_data()}
+    out = []
+    for frame in frames:
+        data = encoded.get(frame)
+        if data is None:
+            data = encoded[frame] = rumble_data(encode_rumble(*frame))
+        out.append(data)
+    return out
+
+
+_SILENCE = rumble_data()
+
+
+class _Playback:
+    __slots__ = ("frames", "index", "loop", "future")
+
+    def __init__(self, frames, loop, future):
+        self.frames = frames
+        self.index = 0
+        self.loop = loop
+        self.future = future
+
+
+class RumbleScheduler:
+    """
+    Plays rumble waveforms on many JoyCons from one thread.
+
+        scheduler = RumbleScheduler()
+        joycon.enable_vibration()
+        scheduler.play(joycon, encode_waveform([(320, 0.8, 160, 0.8)] * 20))
+
+    Every `period` seconds, the rate at which a joycon takes rumble data,
+    the thread advances each waveform by one frame and sends a rumble-only
+    report to each joycon whose rumble data changed, and to no other.
+    Playing a new waveform on a joycon replaces the current one; changes
+    made between two frames are coalesced into one report. The thread
+    sleeps while nothing plays. Joycons are silenced after their waveform.
+    """
+
+    def __init__(self, period: float = JoyCon._INPUT_REPORT_PERIOD):
+        self.period = period
+        self.reports_sent = 0
+        # replaced, never mutated, so the thread can iterate it
+        self._playing = {}
+        self._sent = {}  # the rumble data each joycon has now, thread only
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="RumbleScheduler", daemon=True)
+        self._thread.start()
+
+    def play(self, joycon, frames, loop=False) -> Future:
+        """
+        starts playing `frames`, a sequence of 8 byte rumble data from
+        `encode_waveform`, on `joycon`, one frame per period. Returns a
+        future resolved when the waveform ends, never if it loops, and
+        cancelled when it is replaced or stopped.
+        """
+        frames = list(frames)
+        if any(len(data) != 8 for data in frames):
+            raise ValueError("frames must be 8 bytes of rumble data, see encode_waveform")
+        future = Future()
+        if not frames:
+            future.set_result(None)
+            return future
+        self._replace(joycon, _Playback(frames, loop, future))
+        return future
+
+    def stop(self, joycon):
+        """stops the waveform playing on `joycon`, silencing it"""
+        self._replace(joycon, _Playback([_SILENCE], False, Future()))
+
+    def _replace(self, joycon, playback):
+        with self._cond:
+            playing = dict(self._playing)
+            previous = playing.get(joycon)
+            playing[joycon] = playback
+            self._playing = playing
+            if previous is not None:
+                previous.future.cancel()
+            self._cond.notify()
+
+    def _finish(self, joycon, playback, exception=None):
+        # drops a playback and resolves its future, unless it was replaced meanwhile
+        with self._cond:
+            if self._playing.get(joycon) is not playback:
+                return
+            playing = dict(self._playing)
+            if exception is None and playback.frames[-1] != _SILENCE:
+                playing[joycon] = _Playback([_SILENCE], False, Future())
+            else:
+                del playing[joycon]
+            self._playing = playing
+            try:
+                if exception is None:
+                    playback.future.set_result(None)
+                else:
+                    playback.future.set_exception(exception)
+            except _InvalidStateError:
+                pass  # cancelled by the caller
+
+    def _run(self):  # scheduler thread
+        sent = self._sent
+        due = time.monotonic()
+        while self._running:
+            with self._cond:
+                if not self._playing:
+                    self._cond.wait()
+                    due = time.monotonic()
+                    continue
+            for joycon, playback in self._playing.items():
+                data = playback.frames[playback.index]
+                if sent.get(joycon) != data:
+                    try:
+                        joycon.send_rumble(data)
+                    except (IOError, OSError, ValueError, AttributeError) as e:
+                        sent.pop(joycon, None)
+                        self._finish(joycon, playback, e)
+                        continue
+                    sent[joycon] = data
+                    self.reports_sent += 1
+                playback.index += 1
+                if playback.index == len(playback.frames):
+                    if playback.loop:
+                        playback.index = 0
+                    else:
+                        self._finish(joycon, playback)
+            if len(sent) > len(self._playing) * 2:
+                # forget joycons which are no longer played on
+                playing = self._playing
+                self._sent = sent = {j: d for j, d in sent.items() if j in playing}
+
+            # keep to the schedule, unless the thread fell a whole period behind
+            now = time.monotonic()
+            due = due + self.period if now - due < self.period else now + self.period
+            if due > now:
+                time.sleep(due - now)
+
+    def close(self):
+        """stops the thread, the joycons keep their current rumble"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
@@ -0,0 +1,214 @@
+"""
+The latest state of a JoyCon in shared memory, for other processes.
+
+    joycon = GyroTrackingJoyCon(*get_R_id(), shared_memory=True)
+    name = joycon.shared_memory.name
+
+    # in any number of other processes
+    reader = SharedStateReader(name)
+    shared = reader.read()
+    print(shared.state.buttons, shared.orientation)
+
+The reader thread of the JoyCon writes every input report into one block
+of fixed-offset fields, guarded by a seqlock: a counter which is odd while
+the fields are written. Readers read the counter, the fields and the counter
+again, and retry if it changed or was odd. Reading takes no lock, no
+syscall and no pickling, and readers never write, so any number of them
+can read at once. Needs Python 3.8 for `multiprocessing.shared_memory`.
+
+The layout, all little-endian:
+
+    offset  size  field
+         0     4  MAGIC
+         4     4  LAYOUT_SIZE, uint32
+         8     8  the seqlock counter, uint64
+        16     8  the sequence number of the report, int64, -1 before the first
+        24     8  its host timestamp, float64, time.monotonic() seconds
+        32    32  the orientation (w, x, y, z), 4 float64
+        64    96  the IMU calibration of JoyConState, 12 float64
+       160     1  flags, bit 0 set if the orientation is valid
+       168    49  the raw input report
+"""
+from multiprocessing import shared_memory
+from collections import namedtuple
+import os
+import struct
+import threading
+import time
+
+from .state import JoyConState
+
+MAGIC = b"JCS1"
+LAYOUT_SIZE = 256
+
+_HEADER = struct.Struct("<4sI")
+_SEQLOCK = struct.Struct("<Q")
+_SEQLOCK_OFFSET = 8
+# everything behind the seqlock: seq, timestamp, orientation, calibration, flags, report
+_PAYLOAD = struct.Struct("<qd4d12dB7x49s")
+_PAYLOAD_OFFSET = 16
+# the parts of it the writer updates separately
+_REPORT_FIELDS = struct.Struct("<qd4d")
+_CALIBRATION = struct.Struct("<12d")
+_CALIBRATION_OFFSET = 64
+_REPORT = struct.Struct("<B7x49s")
+_REPORT_OFFSET = 160
+_HAS_ORIENTATION = 0x01
+
+_NO_ORIENTATION = (1.0, 0.0, 0.0, 0.0)
+
+# the writer is rarely caught in the middle, this many retries before yielding
+_SPINS = 100
+
+# the blocks published by this process, or the one it was forked from
+_published = set()
+
+
+class SharedState(namedtuple("SharedState", ["state", "orientation"])):
+    """
+    A snapshot read from shared memory: the JoyConState of the latest
+    report, and the `(w, x, y, z)` orientation as of that report, None if
+    the publishing JoyCon doesn't track one.
+    """
+    __slots__ = ()
+
+
+class SharedStatePublisher:
+    """
+    Writes the state of one JoyCon into a new shared memory block, see the
+    module docs. Made by `JoyCon(..., shared_memory=...)`, which publishes
+    every input report once its update hooks ran, so the orientation of a
+    GyroTrackingJoyCon is already up to date.
+
+    The orientation is the `direction_Q` of a GyroTrackingJoyCon, or of
+    FusionTrackingJoyCon, if the JoyCon has one.
+    """
+
+    def __init__(self, name: str = None):
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=LAYOUT_SIZE)
+        self.name = self._shm.name
+        _published.add(self.name)
+        self._buf = self._shm.buf
+        self._seqlock = 0
+        self._calibration = None
+        self._lock = threading.Lock()  # so close() can't release the buffer mid-write
+        _HEADER.pack_into(self._buf, 0, MAGIC, LAYOUT_SIZE)
+        _PAYLOAD.pack_into(
+            self._buf, _PAYLOAD_OFFSET, -1, 0.0, *_NO_ORIENTATION,
+            0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, b"")
+
+    def publish(self, joycon):  # reader thread
+        report, seq, timestamp = joycon._report_state
+        q = getattr(joycon, "direction_Q", None)
+        if q is None:
+            w, x, y, z = _NO_ORIENTATION
+            flags = 0
+        else:
+            w, x, y, z = q.w, q.x, q.y, q.z
+            flags = _HAS_ORIENTATION
+
+        calibration = joycon._get_imu_calibration()
+        with self._lock:
+            buf = self._buf
+            if buf is None:
+                return  # closed
+            counter = self._seqlock
+            _SEQLOCK.pack_into(buf, _SEQLOCK_OFFSET, counter + 1)  # odd: being written
+            _REPORT_FIELDS.pack_into(buf, _PAYLOAD_OFFSET, seq, timestamp, w, x, y, z)
+            if calibration is not self._calibration:  # rebuilt only when it changed
+                self._calibration = calibration
+                _CALIBRATION.pack_into(buf, _CALIBRATION_OFFSET, *calibration)
+            _REPORT.pack_into(buf, _REPORT_OFFSET, flags, report)
+            self._seqlock = counter + 2
+            _SEQLOCK.pack_into(buf, _SEQLOCK_OFFSET, counter + 2)
+
+    def close(self):
+        """removes the block, readers which have it open keep their mapping"""
+        with self._lock:  # waits for a publish in progress
+            if self._buf is None:
+                return
+            self._buf = None
+        self._shm.close()
+        _published.discard(self.name)
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedStateReader:
+    """
+    Reads the state a `SharedStatePublisher` named `name` publishes, from
+    any process.
+    """
+
+    def __init__(self, name: str):
+        self._shm = _attach(name)
+        self._buf = self._shm.buf
+        magic, size = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or size != LAYOUT_SIZE:
+            self.close()
+            raise ValueError(f"{name!r} is not a JoyCon state block")
+        self.name = name
+        self.retries = 0  # reads which caught the writer in the middle
+
+    @property
+    def seq(self) -> int:
+        """the sequence number of the latest report, cheap to poll for a new one"""
+        return struct.unpack_from("<q", self._buf, _PAYLOAD_OFFSET)[0]
+
+    def read(self, timeout: float = 1.0) -> SharedState:
+        """
+        returns a consistent snapshot of the latest state. Raises
+        TimeoutError if none could be read within `timeout` seconds, which
+        means the publishing process died while writing.
+        """
+        buf = self._buf
+        seqlock_from = _SEQLOCK.unpack_from
+        payload_from = _PAYLOAD.unpack_from
+        deadline = None
+        spins = 0
+        while True:
+            before, = seqlock_from(buf, _SEQLOCK_OFFSET)
+            if not before & 1:
+                fields = payload_from(buf, _PAYLOAD_OFFSET)
+                if seqlock_from(buf, _SEQLOCK_OFFSET)[0] == before:
+                    break
+            self.retries += 1
+            spins += 1
+            if spins >= _SPINS:
+                # let the writer finish, it may be waiting for this core
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + timeout
+                elif now > deadline:
+                    raise TimeoutError(f"the state in {self.name!r} stays inconsistent")
+                spins = 0
+                time.sleep(0)
+
+        seq, timestamp, w, x, y, z = fields[:6]
+        flags, report = fields[18], fields[19]
+        state = JoyConState(report, seq, timestamp, fields[6:18])
+        return SharedState(state, (w, x, y, z) if flags & _HAS_ORIENTATION else None)
+
+    def close(self):
+        if self._buf is None:
+            return
+        self._buf = None
+        self._shm.close()
+
+
+def _attach(name):
+    # opens an existing block without handing it to the resource tracker,
+    # which would remove it when this process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    # Windows removes a block with its last handle, and a forked process
+    # shares the tracker of its parent, which still has to remove the block
+    if os.name == "posix" and name not in _published:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
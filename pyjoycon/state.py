@@ -0,0 +1,169 @@
+"""
+Immutable snapshots of the input of a JoyCon, see `JoyCon.get_state`.
+
+A snapshot holds one input report buffer, so every field it returns comes
+from the same report, even while the reader thread moves on. Fields are
+decoded from the buffer when first read.
+"""
+from .constants import BUTTON_BITS
+import struct
+
+_setattr = object.__setattr__
+
+# one IMU sample, (accel xyz, gyro xyz)
+_IMU_SAMPLE = struct.Struct('<6h')
+_IMU_OFFSET = 13
+_IMU_SAMPLE_SIZE = 12
+
+
+class JoyConState:
+    """
+    The state of a JoyCon as of one 0x30 input report.
+
+        report    : the raw input report
+        seq       : its sequence number, -1 before the first report
+        timestamp : its host timestamp, in time.monotonic() seconds
+
+    Snapshots are immutable and safe to share between threads. The IMU
+    values are calibrated like `JoyCon.get_accel_x()`, without the axis
+    inversion of PythonicJoyCon.
+    """
+
+    __slots__ = ("report", "seq", "timestamp", "_calibration", "_imu")
+
+    def __init__(self, report: bytes, seq: int = -1, timestamp: float = 0.0,
+                 calibration=(0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1)):
+        # calibration: accel and gyro offsets xyz, then accel and gyro coefficients xyz
+        _setattr(self, "report", report)
+        _setattr(self, "seq", seq)
+        _setattr(self, "timestamp", timestamp)
+        _setattr(self, "_calibration", calibration)
+        _setattr(self, "_imu", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), (self.report, self.seq, self.timestamp, self._calibration)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(seq={self.seq}, buttons=0x{self.buttons:06x}, "
+                f"stick_l={self.stick_l}, stick_r={self.stick_r})")
+
+    @property
+    def battery_charging(self) -> int:
+        return self.report[2] >> 4 & 1
+
+    @property
+    def battery_level(self) -> int:
+        return self.report[2] >> 5
+
+    @property
+    def buttons(self) -> int:
+        """the buttons as one 24 bit mask, see constants.BUTTON_BITS"""
+        report = self.report
+        return report[3] | report[4] << 8 | report[5] << 16
+
+    def pressed(self, button: str) -> int:
+        """returns 1 if `button`, a name of constants.BUTTON_BITS, is pressed"""
+        return self.buttons >> BUTTON_BITS[button] & 1
+
+    @property
+    def stick_l(self) -> (int, int):
+        report = self.report
+        return report[6] | (report[7] & 0xF) << 8, report[7] >> 4 | report[8] << 4
+
+    @property
+    def stick_r(self) -> (int, int):
+        report = self.report
+        return report[9] | (report[10] & 0xF) << 8, report[10] >> 4 | report[11] << 4
+
+    def _sample(self, i):
+        ax, ay, az, gx, gy, gz = _IMU_SAMPLE.unpack_from(
+            self.report, _IMU_OFFSET + i * _IMU_SAMPLE_SIZE)
+        aox, aoy, aoz, gox, goy, goz, acx, acy, acz, gcx, gcy, gcz = self._calibration
+        return (
+            (ax - aox) * acx, (ay - aoy) * acy, (az - aoz) * acz,
+            (gx - gox) * gcx, (gy - goy) * gcy, (gz - goz) * gcz,
+        )
+
+    @property
+    def imu(self) -> tuple:
+        """the three calibrated `(accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z)` samples"""
+        samples = self._imu
+        if samples is None:
+            samples = (self._sample(0), self._sample(1), self._sample(2))
+            _setattr(self, "_imu", samples)
+        return samples
+
+    def _first_sample(self):
+        samples = self._imu
+        return self._sample(0) if samples is None else samples[0]
+
+    @property
+    def accel(self) -> (float, float, float):
+        """the first accelerometer sample, like get_accel_x() and friends"""
+        return self._first_sample()[:3]
+
+    @property
+    def gyro(self) -> (float, float, float):
+        """the first gyroscope sample, like get_gyro_x() and friends"""
+        return self._first_sample()[3:]
+
+    def to_dict(self) -> dict:
+        """returns the nested dict of `JoyCon.get_status()`, freshly built"""
+        report = self.report
+        battery, r, s, l = report[2], report[3], report[4], report[5]  # noqa: E741
+        ax, ay, az, gx, gy, gz = self._first_sample()
+        return {
+            "battery": {
+                "charging": battery >> 4 & 1,
+                "level": battery >> 5,
+            },
+            "buttons": {
+                "right": {
+                    "y": r & 1,
+                    "x": r >> 1 & 1,
+                    "b": r >> 2 & 1,
+                    "a": r >> 3 & 1,
+                    "sr": r >> 4 & 1,
+                    "sl": r >> 5 & 1,
+                    "r": r >> 6 & 1,
+                    "zr": r >> 7,
+                },
+                "shared": {
+                    "minus": s & 1,
+                    "plus": s >> 1 & 1,
+                    "r-stick": s >> 2 & 1,
+                    "l-stick": s >> 3 & 1,
+                    "home": s >> 4 & 1,
+                    "capture": s >> 5 & 1,
+                    "charging-grip": s >> 7,
+                },
+                "left": {
+                    "down": l & 1,
+                    "up": l >> 1 & 1,
+                    "right": l >> 2 & 1,
+                    "left": l >> 3 & 1,
+                    "sr": l >> 4 & 1,
+                    "sl": l >> 5 & 1,
+                    "l": l >> 6 & 1,
+                    "zl": l >> 7,
+                }
+            },
+            "analog-sticks": {
+                "left": {
+                    "horizontal": report[6] | (report[7] & 0xF) << 8,
+                    "vertical": report[7] >> 4 | report[8] << 4,
+                },
+                "right": {
+                    "horizontal": report[9] | (report[10] & 0xF) << 8,
+                    "vertical": report[10] >> 4 | report[11] << 4,
+                },
+            },
+            "accel": {"x": ax, "y": ay, "z": az},
+            "gyro": {"x": gx, "y": gy, "z": gz},
+        }
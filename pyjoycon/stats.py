@@ -0,0 +1,147 @@
+import collections
+import math
+import time
+from array import array
+
+
+class ReportStats:
+    """
+    Timing and loss counters of the input report stream, kept by the reader.
+
+    Updating costs a few integer operations per report, plus one clock read
+    per hook, so it can stay on in production:
+
+        bytes         : the size of the input reports read
+        inter-arrival : host time between input reports, as a histogram of
+                        `bin_width` wide bins, with mean and jitter (stddev)
+        lost          : reports missing from the stream, from the timer byte
+                        at report[1], which counts `timer_period` ticks
+        hooks         : the execution time of each registered hook
+        read_to_hook  : time from reading a report until all hooks ran
+        discarded     : reports nobody handled, by report id, like 0x21
+                        replies to subcommands which timed out or were
+                        cancelled, or unknown report ids
+
+    Durations are kept in bounded windows of the last `window` reports.
+    `snapshot()` returns all of it as a plain dict, in seconds.
+    """
+
+    def __init__(self, report_period: float = 0.015, timer_period: float = 0.005,
+                 bins: int = 64, bin_width: float = 0.001, window: int = 1024):
+        self.report_period = report_period
+        self.timer_period = timer_period
+        self.bin_width = bin_width
+        self.window = window
+        self._ticks_per_report = report_period / timer_period
+        self._bins = bins
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.reports = 0
+        self.bytes = 0  # the size of the reports, as read from the device
+        self.lost = 0
+        self.gaps = 0  # times one or more reports went missing
+        self.discarded = collections.Counter()
+        self._interarrival = array('L', bytes(array('L').itemsize * self._bins))
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._max = 0.0
+        self._last_time = None
+        self._last_timer = 0
+        self._hook_times = {}
+        self._read_to_hook = collections.deque(maxlen=self.window)
+
+    def report(self, report, timestamp: float):  # reader thread
+        """counts an input report, read at `timestamp`"""
+        self.reports += 1
+        self.bytes += len(report)
+        last = self._last_time
+        self._last_time = timestamp
+        if last is None:
+            self._last_timer = report[1]
+            return
+
+        dt = timestamp - last
+        self._interarrival[min(int(dt / self.bin_width), self._bins - 1)] += 1
+        self._sum += dt
+        self._sum_sq += dt * dt
+        if dt > self._max:
+            self._max = dt
+
+        if report[0] != 0x30:
+            return  # simple mode reports have no timer, and come on change
+        timer = report[1]
+        ticks = (timer - self._last_timer) & 0xFF
+        self._last_timer = timer
+        if dt > 0.5 * 0x100 * self.timer_period:
+            # the timer may have wrapped around, trust the host clock instead
+            ticks = dt / self.timer_period
+        missed = int(ticks / self._ticks_per_report + 0.5) - 1
+        if missed > 0:
+            self.lost += missed
+            self.gaps += 1
+
+    def run_hooks(self, joycon, hooks, timestamp: float):  # reader thread
+        """calls the hooks, timing each of them"""
+        clock = time.perf_counter
+        hook_times = self._hook_times
+        for callback in hooks:
+            start = clock()
+            callback(joycon)
+            elapsed = clock() - start
+            times = hook_times.get(callback)
+            if times is None:
+                times = hook_times[callback] = collections.deque(maxlen=self.window)
+            times.append(elapsed)
+        self._read_to_hook.append(time.monotonic() - timestamp)
+
+    def forget_hook(self, callback):
+        self._hook_times.pop(callback, None)
+
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        samples = sorted(samples)
+        if not samples:
+            return {"count": 0}
+        n = len(samples)
+        return {
+            "count": n,
+            "p50": samples[(n - 1) // 2],
+            "p90": samples[int((n - 1) * 0.9)],
+            "p99": samples[int((n - 1) * 0.99)],
+            "max": samples[-1],
+        }
+
+    def snapshot(self) -> dict:
+        """returns the current counters as a dict, safe to call from any thread"""
+        histogram = self._interarrival.tolist()
+        intervals = sum(histogram)
+        mean = self._sum / intervals if intervals else 0.0
+        variance = self._sum_sq / intervals - mean * mean if intervals else 0.0
+        received = self.reports
+        hooks = {}
+        # copying with list() is atomic, the reader thread may be appending
+        for callback, times in list(self._hook_times.items()):
+            name = getattr(callback, "__qualname__", repr(callback))
+            if name in hooks:
+                name = f"{name} at {id(callback):#x}"
+            hooks[name] = self._percentiles(list(times))
+        return {
+            "uptime": time.monotonic() - self.started,
+            "reports": received,
+            "bytes": self.bytes,
+            "lost": self.lost,
+            "gaps": self.gaps,
+            "loss_ratio": self.lost / (received + self.lost) if received else 0.0,
+            "interarrival": {
+                "mean": mean,
+                "jitter": math.sqrt(max(variance, 0.0)),
+                "max": self._max,
+                "bin_width": self.bin_width,
+                "histogram": histogram,
+            },
+            "read_to_hook": self._percentiles(list(self._read_to_hook)),
+            "hooks": hooks,
+            "discarded": {f"0x{k:02x}": v for k, v in list(self.discarded.items())},
+        }
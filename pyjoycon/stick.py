@@ -0,0 +1,89 @@
+"""
+Analog stick calibration, compiled into lookup tables.
+
+The SPI flash holds, for each stick, the raw center of both axes and how
+far they reach below and above it. `axis_table` turns one axis of that
+into a table of 4096 floats, indexed by the raw 12 bit value, so a
+calibrated stick costs one index per axis.
+"""
+
+# where the 9 byte stick calibration lives, user areas start with USER_CAL_MAGIC
+USER_CAL_MAGIC = b"\xB2\xA1"
+USER_STICK_CAL_L = 0x8010
+USER_STICK_CAL_R = 0x801B
+FACTORY_STICK_CAL_L = 0x603D
+FACTORY_STICK_CAL_R = 0x6046
+STICK_CAL_SIZE = 9
+
+STICK_RAW_RANGE = 0x1000
+
+# (center, below, above) of (horizontal, vertical), for unprogrammed flash
+DEFAULT_STICK_CALIBRATION = ((0x800, 0x800), (0x578, 0x578), (0x578, 0x578))
+DEFAULT_DEADZONE = 0.1
+DEFAULT_OUTER = 1.0
+
+# the table of a stick without calibration, which the joycon doesn't have
+ZERO_TABLE = (0.0,) * STICK_RAW_RANGE
+
+
+def _unpack_pairs(data):
+    # three packed 24 bit (horizontal, vertical) pairs
+    return [
+        (data[i] | (data[i + 1] & 0xF) << 8, data[i + 1] >> 4 | data[i + 2] << 4)
+        for i in (0, 3, 6)
+    ]
+
+
+def pack_stick_calibration(center_xy, below_xy, above_xy, left: bool) -> bytes:
+    """the inverse of `parse_stick_calibration`"""
+    pairs = (above_xy, center_xy, below_xy) if left else (center_xy, below_xy, above_xy)
+    return bytes(
+        b for x, y in pairs
+        for b in (x & 0xFF, x >> 8 & 0xF | (y & 0xF) << 4, y >> 4 & 0xFF))
+
+
+def parse_stick_calibration(data: bytes, left: bool) -> tuple:
+    """
+    returns the `(center_xy, below_xy, above_xy)` of 9 bytes of stick
+    calibration. The left and right stick store them in different orders.
+    Unprogrammed or broken data gives `DEFAULT_STICK_CALIBRATION`.
+    """
+    if len(data) != STICK_CAL_SIZE or data == b"\xff" * STICK_CAL_SIZE:
+        return DEFAULT_STICK_CALIBRATION
+    if left:
+        above, center, below = _unpack_pairs(data)
+    else:
+        center, below, above = _unpack_pairs(data)
+    if 0 in below or 0 in above:
+        return DEFAULT_STICK_CALIBRATION
+    return center, below, above
+
+
+def axis_table(center: int, below: int, above: int,
+               deadzone: float = DEFAULT_DEADZONE, outer: float = DEFAULT_OUTER) -> tuple:
+    """
+    returns a table mapping every raw value of an axis to [-1, 1].
+
+    arg: center   : the raw value at rest
+    arg: below    : how far the axis reaches below the center
+    arg: above    : how far the axis reaches above the center
+    arg: deadzone : the fraction of the range around the center which reads 0
+    arg: outer    : the fraction of the range from which on the axis reads -1 or 1
+
+    Between the two, the values are scaled linearly from 0 to 1.
+    """
+    if not 0 <= deadzone < outer:
+        raise ValueError(f'deadzone and outer are invalid: {deadzone!r}, {outer!r}')
+    if below <= 0 or above <= 0:
+        raise ValueError(f'below and above are invalid: {below!r}, {above!r}')
+    span = outer - deadzone
+    table = []
+    for raw in range(STICK_RAW_RANGE):
+        offset = raw - center
+        n = offset / above if offset > 0 else -offset / below
+        if n <= deadzone:
+            table.append(0.0)
+        else:
+            n = min((n - deadzone) / span, 1.0)
+            table.append(n if offset > 0 else -n)
+    return tuple(table)
@@ -0,0 +1,315 @@
+"""
+The byte pipes a JoyCon talks through.
+
+`JoyCon` reads input reports from and writes output reports to a transport.
+By default that is a `HidTransport` to the real device; pass another one as
+`JoyCon(..., transport=...)` to run without hardware.
+"""
+import collections
+import math
+import random
+import struct
+import threading
+import time
+
+import hid
+
+from .constants import JOYCON_VENDOR_ID, JOYCON_L_PRODUCT_ID, JOYCON_R_PRODUCT_ID
+from .constants import BUTTON_BITS, SIMPLE_BUTTONS_L, SIMPLE_BUTTONS_R
+from .stick import DEFAULT_STICK_CALIBRATION, FACTORY_STICK_CAL_L, FACTORY_STICK_CAL_R
+from .stick import STICK_CAL_SIZE, pack_stick_calibration
+
+
+class Transport:
+    """
+    The interface JoyCon expects from a transport, modelled after hid devices.
+    """
+
+    def read(self, size: int) -> bytes:
+        """
+        returns the next input report. Blocks until there is one, unless the
+        transport is non-blocking, in which case it returns b"" instead.
+        """
+        raise NotImplementedError
+
+    def write(self, data) -> None:
+        """sends an output report"""
+        raise NotImplementedError
+
+    def set_nonblocking(self, nonblocking) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class HidTransport(Transport):
+    """A JoyCon connected through `hidapi` or `hid`."""
+
+    def __init__(self, vendor_id: int, product_id: int, serial: str = None):
+        try:
+            if hasattr(hid, "device"):  # hidapi
+                self._device = hid.device()
+                self._device.open(vendor_id, product_id, serial)
+            elif hasattr(hid, "Device"):  # hid
+                self._device = hid.Device(vendor_id, product_id, serial)
+            else:
+                raise Exception("Implementation of hid is not recognized!")
+        except IOError as e:
+            raise IOError('joycon connect failed') from e
+
+        # bind the hot path directly
+        self.read = self._device.read
+        if hasattr(hid, "device"):
+            self.write = self._device.write
+        else:  # hid takes bytes only, JoyCon writes a reused bytearray
+            self.write = lambda data: self._device.write(bytes(data))
+
+    def set_nonblocking(self, nonblocking):
+        if hasattr(self._device, "set_nonblocking"):  # hidapi
+            self._device.set_nonblocking(int(bool(nonblocking)))
+        else:  # hid
+            self._device.nonblocking = bool(nonblocking)
+
+    def close(self):
+        self._device.close()
+
+
+class SimulatedJoyCon(Transport):
+    """
+    A virtual JoyCon, answering subcommands and streaming input reports.
+
+        sim = SimulatedJoyCon(buttons=lambda t: 0x08 if t % 1 < 0.5 else 0)
+        joycon = PythonicJoyCon(*sim.device_id, transport=sim)
+
+    Like the real device, it replies to every subcommand with a 0x21 report.
+    It serves SPI flash reads (0x10) from an image holding its colors and
+    factory IMU and stick calibration, and follows IMU enable (0x40), report mode
+    (0x03), player lamp (0x30) and vibration enable (0x48) subcommands. `rumble`
+    holds the rumble data of the last output report.
+
+    Each reply can be read `reply_delay` seconds after its subcommand, like
+    the round trip over Bluetooth.
+
+    Once in mode 0x30 it streams a report every `period` seconds, each one
+    displaced by up to `jitter` seconds. In simple HID mode (0x3f) it checks
+    the input as often, but only sends a 12 byte report when it changed.
+    `reports_sent` and `bytes_sent` count what went over the air.
+    The input comes from waveforms: constants or functions of the time in
+    seconds since streaming started.
+
+        buttons  : 24 bit button mask, like bytes 3-5 of a report
+        stick_l  : (horizontal, vertical) 12 bit raw values
+        stick_r  : (horizontal, vertical) 12 bit raw values
+        imu      : six raw int16 (accel xyz, gyro xyz), evaluated per
+                   IMU sample, every 5 ms
+        battery  : the battery nibble, level << 1 | charging
+    """
+    _IMU_SAMPLE_PERIOD = 0.005
+    _FLASH_SIZE = 0x10000
+    _FACTORY_IMU_CAL = struct.pack(
+        '<12h', 0, 0, 0, 0x4000, 0x4000, 0x4000, 0, 0, 0, 0x343b, 0x343b, 0x343b)
+
+    def __init__(self, product_id: int = JOYCON_R_PRODUCT_ID, serial: str = None,
+                 period: float = 0.015, jitter: float = 0.0, seed: int = None,
+                 reply_delay: float = 0.0,
+                 buttons=0, stick_l=(2048, 2048), stick_r=(2048, 2048),
+                 imu=(0, 0, 0x1000, 0, 0, 0), battery=0x8,
+                 color_body=(0x0A, 0xB9, 0xE6), color_btn=(0x00, 0x1E, 0x1E)):
+        self.vendor_id = JOYCON_VENDOR_ID
+        self.product_id = product_id
+        self.serial = serial
+        self.period = period
+        self.jitter = jitter
+        self.reply_delay = reply_delay
+        self.buttons = buttons
+        self.stick_l = stick_l
+        self.stick_r = stick_r
+        self.imu = imu
+        self.battery = battery
+
+        self.report_mode = None
+        self.imu_enabled = False
+        self.player_lamp = 0
+        self.vibration_enabled = False
+        self.rumble = b'\x00\x01\x40\x40' * 2
+        self.rumble_reports = 0
+        self.reports_sent = 0
+        self.bytes_sent = 0
+        self.subcommands = collections.Counter()
+
+        self.flash = bytearray(b"\xff" * self._FLASH_SIZE)
+        self.flash[0x6020:0x6038] = self._FACTORY_IMU_CAL
+        self.flash[0x6050:0x6056] = bytes(color_body) + bytes(color_btn)
+        for address, left in ((FACTORY_STICK_CAL_L, True), (FACTORY_STICK_CAL_R, False)):
+            self.flash[address:address + STICK_CAL_SIZE] = pack_stick_calibration(
+                *DEFAULT_STICK_CALIBRATION, left=left)
+
+        self._random = random.Random(seed)
+        self._nonblocking = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._replies = collections.deque()  # (when readable, reply)
+        self._start = None
+        self._due = None
+        self._frames = 0  # input checks since streaming started
+        self._last_simple = None
+        if product_id == JOYCON_L_PRODUCT_ID:
+            self._simple_buttons, self._simple_stick = SIMPLE_BUTTONS_L, "stick_l"
+        else:
+            self._simple_buttons, self._simple_stick = SIMPLE_BUTTONS_R, "stick_r"
+
+    @property
+    def device_id(self):
+        """returns a tuple like `(vendor_id, product_id, serial_number)`"""
+        return self.vendor_id, self.product_id, self.serial
+
+    def set_nonblocking(self, nonblocking):
+        self._nonblocking = bool(nonblocking)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @staticmethod
+    def _value(waveform, t):
+        return waveform(t) if callable(waveform) else waveform
+
+    def write(self, data):
+        data = bytes(data)
+        if self._closed:
+            raise OSError("device is closed")
+        self.rumble = data[2:10]
+        if data[0] != 0x01:
+            self.rumble_reports += 1
+            return  # rumble only
+        subcommand, argument = data[10], data[11:]
+        self.subcommands[subcommand] += 1
+
+        reply = bytearray(49)
+        reply[0] = 0x21
+        reply[13] = 0x80
+        reply[14] = subcommand
+        if subcommand == 0x10:  # SPI flash read
+            address = int.from_bytes(argument[:4], "little")
+            size = min(argument[4], 0x1d)
+            reply[13] = 0x90
+            reply[15:20] = argument[:5]
+            reply[20:20 + size] = self.flash[address:address + size]
+        elif subcommand == 0x03:  # set input report mode
+            self.report_mode = argument[0]
+        elif subcommand == 0x40:  # enable IMU
+            self.imu_enabled = bool(argument[0])
+        elif subcommand == 0x30:  # set player lamps
+            self.player_lamp = argument[0]
+        elif subcommand == 0x48:  # enable vibration
+            self.vibration_enabled = bool(argument[0])
+        self._fill_input(reply, time.monotonic())
+
+        with self._cond:
+            self._replies.append((time.monotonic() + self.reply_delay, bytes(reply)))
+            self._cond.notify_all()
+
+    def _fill_input(self, report, now):
+        t = now - self._start if self._start is not None else 0.0
+        report[1] = int(now / self._IMU_SAMPLE_PERIOD) & 0xFF
+        report[2] = (int(self._value(self.battery, t)) & 0xF) << 4 | 0xE
+        report[3:6] = (int(self._value(self.buttons, t)) & 0xFFFFFF).to_bytes(3, "little")
+        for offset, stick in ((6, self.stick_l), (9, self.stick_r)):
+            h, v = (int(x) for x in self._value(stick, t))
+            report[offset:offset + 3] = ((h & 0xFFF) | (v & 0xFFF) << 12).to_bytes(3, "little")
+        report[12] = 0x70
+
+    def _make_report(self, now):
+        report = bytearray(49)
+        report[0] = 0x30
+        self._fill_input(report, now)
+        if self.imu_enabled:
+            t = now - self._start
+            for i in range(3):
+                # the samples of a report are 5 ms apart, the last one is the newest
+                sample = self._value(self.imu, t - (2 - i) * self._IMU_SAMPLE_PERIOD)
+                struct.pack_into('<6h', report, 13 + 12 * i, *(
+                    max(-0x8000, min(0x7FFF, int(x))) for x in sample))
+        return bytes(report)
+
+    def _make_simple_report(self, now):
+        t = now - self._start
+        buttons = int(self._value(self.buttons, t))
+        report = bytearray(12)
+        report[0] = 0x3f
+        for i, names in enumerate(self._simple_buttons):
+            report[1 + i] = sum(
+                1 << bit for bit, name in enumerate(names)
+                if name and buttons >> BUTTON_BITS[name] & 1)
+        # the stick direction in eighths clockwise from up, 8 when centered
+        h, v = (x - 2048 for x in self._value(getattr(self, self._simple_stick), t))
+        if h * h + v * v < 500 ** 2:
+            report[3] = 8
+        else:
+            report[3] = round(math.atan2(h, v) / (math.pi / 4)) % 8
+        return bytes(report)
+
+    def make_reports(self, n: int, start: float = 0.0) -> list:
+        """
+        returns `n` consecutive 0x30 reports, `period` seconds apart, from
+        the waveforms starting at time `start`, without waiting in real time.
+        """
+        imu_enabled, self.imu_enabled = self.imu_enabled, True
+        saved_start, self._start = self._start, -start
+        try:
+            return [self._make_report(i * self.period) for i in range(n)]
+        finally:
+            self.imu_enabled, self._start = imu_enabled, saved_start
+
+    def _schedule(self, now):
+        # the next report time, displaced by jitter but never before `now`
+        self._frames += 1
+        base = self._start + self._frames * self.period
+        self._due = max(now, base + self._random.uniform(-self.jitter, self.jitter))
+
+    def read(self, size, timeout_ms=None):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise OSError("device is closed")
+                now = time.monotonic()
+                reply_due = None
+                if self._replies:
+                    reply_due = self._replies[0][0]
+                    if reply_due <= now:
+                        return self._replies.popleft()[1]
+
+                if self.report_mode in (0x30, 0x3f):
+                    if self._start is None:
+                        self._start = now
+                        self._due = now
+                    if now >= self._due:
+                        self._schedule(now)
+                        if self.report_mode == 0x30:
+                            report = self._make_report(now)
+                        else:
+                            report = self._make_simple_report(now)
+                            if report == self._last_simple:
+                                continue  # sent on change only
+                            self._last_simple = report
+                        self.reports_sent += 1
+                        self.bytes_sent += len(report)
+                        return report
+                    wait = self._due - now
+                else:
+                    wait = None
+                if reply_due is not None:
+                    wait = reply_due - now if wait is None else min(wait, reply_due - now)
+
+                if self._nonblocking:
+                    return b""
+                self._cond.wait(wait)
+
+
+def sine(amplitude, frequency, offset=0.0, phase=0.0):
+    """returns a waveform `offset + amplitude * sin(2 pi (frequency t + phase))`"""
+    def waveform(t):
+        return offset + amplitude * math.sin(2 * math.pi * (frequency * t + phase))
+    return waveform
@@ -1,3 +1,4 @@
+from .constants import JOYCON_L_PRODUCT_ID
 from .joycon import JoyCon
 
 
@@ -10,14 +11,17 @@ class PythonicJoyCon(JoyCon):
      *  using properties instead of requiring java-style getters and setters,
      *  bundles related xy/xyz data in tuples
      *  bundles the multiple measurements of the
-        gyroscope and accelerometer into a list
+        gyroscope and accelerometer into a list,
+        decoded in a single pass per input report
      *  Adds the option to invert the y and z axis of the left joycon
         to make it match the right joycon. This is enabled by default
     """
 
     def __init__(self, *a, invert_left_ime_yz=True, **kw):
+        # set before the reader thread starts, its hooks use it from the first report
+        product_id = kw["product_id"] if "product_id" in kw else a[1]
+        self._ime_yz_coeff = -1 if invert_left_ime_yz and product_id == JOYCON_L_PRODUCT_ID else 1
         super().__init__(*a, **kw)
-        self._ime_yz_coeff = -1 if invert_left_ime_yz and self.is_left() else 1
 
     is_charging   = property(JoyCon.get_battery_charging)
     battery_level = property(JoyCon.get_battery_level)
@@ -46,6 +50,8 @@ class PythonicJoyCon(JoyCon):
     left_sr       = property(JoyCon.get_button_left_sr)
     left_sl       = property(JoyCon.get_button_left_sl)
 
+    stick_hat     = property(JoyCon.get_stick_hat)
+
     set_led_on       = JoyCon.set_player_lamp_on
     set_led_flashing = JoyCon.set_player_lamp_flashing
     set_led          = JoyCon.set_player_lamp
@@ -65,78 +71,49 @@ class PythonicJoyCon(JoyCon):
             self.get_stick_right_vertical(),
         )
 
+    stick_l_calibrated = property(JoyCon.get_stick_left_calibrated)
+    stick_r_calibrated = property(JoyCon.get_stick_right_calibrated)
+
+    @property
+    def imu(self):
+        return self.get_imu_samples()
+
     @property
     def accel(self):
-        c = self._ime_yz_coeff
-        return [
-            (
-                self.get_accel_x(i),
-                self.get_accel_y(i) * c,
-                self.get_accel_z(i) * c,
-            )
-            for i in range(3)
-        ]
+        return [s[:3] for s in self.get_imu_samples()]
 
     @property
     def accel_in_g(self):
         c = 4.0 / 0x4000
-        c2 = c * self._ime_yz_coeff
         return [
-            (
-                self.get_accel_x(i) * c,
-                self.get_accel_y(i) * c2,
-                self.get_accel_z(i) * c2,
-            )
-            for i in range(3)
+            (ax * c, ay * c, az * c)
+            for ax, ay, az, _, _, _ in self.get_imu_samples()
         ]
 
     @property
     def gyro(self):
-        c = self._ime_yz_coeff
-        return [
-            (
-                self.get_gyro_x(i),
-                self.get_gyro_y(i) * c,
-                self.get_gyro_z(i) * c,
-            )
-            for i in range(3)
-        ]
+        return [s[3:] for s in self.get_imu_samples()]
 
     @property
     def gyro_in_deg(self):
         c = 0.06103
-        c2 = c * self._ime_yz_coeff
         return [
-            (
-                self.get_gyro_x(i) * c,
-                self.get_gyro_y(i) * c2,
-                self.get_gyro_z(i) * c2,
-            )
-            for i in range(3)
+            (gx * c, gy * c, gz * c)
+            for _, _, _, gx, gy, gz in self.get_imu_samples()
         ]
 
     @property
     def gyro_in_rad(self):
-        c = 0.0001694 * 3.1415926536
-        c2 = c * self._ime_yz_coeff
+        c = 0.0001694 * 2 * 3.1415926536
         return [
-            (
-                self.get_gyro_x(i) * c,
-                self.get_gyro_y(i) * c2,
-                self.get_gyro_z(i) * c2,
-            )
-            for i in range(3)
+            (gx * c, gy * c, gz * c)
+            for _, _, _, gx, gy, gz in self.get_imu_samples()
         ]
 
     @property
     def gyro_in_rot(self):
         c = 0.0001694
-        c2 = c * self._ime_yz_coeff
         return [
-            (
-                self.get_gyro_x(i) * c,
-                self.get_gyro_y(i) * c2,
-                self.get_gyro_z(i) * c2,
-            )
-            for i in range(3)
+            (gx * c, gy * c, gz * c)
+            for _, _, _, gx, gy, gz in self.get_imu_samples()
         ]
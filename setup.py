@@ -25,7 +25,7 @@ setup(
     ]),
     url='https://github.com/tokoroten-lab/joycon-python',
     license=license,
-    packages=find_packages(),
+    packages=find_packages(exclude=("benchmarks", "benchmarks.*")),
     # install_requires=requirements,
     classifiers=[
         'Programming Language :: Python :: 3.7'
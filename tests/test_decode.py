@@ -0,0 +1,29 @@
+import numpy as np
+
+from pyjoycon import SimulatedJoyCon
+from pyjoycon.decode import REPORT_DTYPE, calibrate_sticks, decode_reports
+from pyjoycon.decode import orientations, sample_periods
+
+
+def test_decode_empty():
+    for data in (b"", np.empty((0, 49), dtype=np.uint8)):
+        decoded = decode_reports(data)
+        assert decoded.shape == (0,)
+        assert decoded.dtype == REPORT_DTYPE
+
+
+def test_decode_empty_sticks():
+    assert calibrate_sticks(decode_reports(b""), np.zeros((4, 4096))).shape == (0, 2, 2)
+
+
+def test_decode_empty_orientations():
+    assert sample_periods(np.empty(0, dtype=np.uint8)).shape == (0,)
+    assert orientations(decode_reports(b"")).shape == (0, 4)
+
+
+def test_decode_reports():
+    sim = SimulatedJoyCon(buttons=0x08, stick_l=(100, 4000))
+    decoded = decode_reports(b"".join(sim.make_reports(3)))
+    assert decoded.shape == (3,)
+    assert (decoded["buttons"] == 0x08).all()
+    assert decoded["stick_l"].tolist() == [[100, 4000]] * 3
@@ -0,0 +1,73 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from pyjoycon import ButtonEventJoyCon, EventQueue, SimulatedJoyCon
+from pyjoycon.eventqueue import COALESCE, DROP_NEWEST, DROP_OLDEST
+
+
+def fill(events, items):
+    return [events.put(item) for item in items]
+
+
+def test_drop_oldest():
+    events = EventQueue(3, DROP_OLDEST)
+    assert fill(events, [("a", 1), ("a", 0), ("b", 1), ("b", 0)]) == [True] * 4
+    assert events.drain() == [("a", 0), ("b", 1), ("b", 0)]
+    assert events.dropped == 1
+
+
+def test_drop_newest():
+    events = EventQueue(3, DROP_NEWEST)
+    assert fill(events, [("a", 1), ("a", 0), ("b", 1), ("b", 0)]) == [True] * 3 + [False]
+    assert events.drain() == [("a", 1), ("a", 0), ("b", 1)]
+    assert events.dropped == 1
+
+
+def test_coalesce_drops_a_press_and_its_release():
+    events = EventQueue(4, COALESCE)
+    fill(events, [("a", 1), ("b", 1), ("a", 0), ("b", 0), ("c", 1)])
+    # the state after every event is unchanged, "b" is released and "c" pressed
+    assert events.drain() == [("b", 1), ("b", 0), ("c", 1)]
+    assert (events.dropped, events.coalesced) == (2, 1)
+
+
+def test_coalesce_without_pair_drops_oldest():
+    events = EventQueue(2, COALESCE)
+    fill(events, [("a", 1), ("b", 1), ("c", 1)])
+    assert events.drain() == [("b", 1), ("c", 1)]
+    assert (events.dropped, events.coalesced) == (1, 0)
+
+
+def test_get_waits_for_put():
+    events = EventQueue()
+    threading.Timer(0.05, events.put, [("a", 1)]).start()
+    assert events.get(timeout=1) == ("a", 1)
+    with pytest.raises(queue.Empty):
+        events.get(timeout=0.01)
+    with pytest.raises(queue.Empty):
+        events.get_nowait()
+
+
+def test_drain_waits_for_the_first_event():
+    events = EventQueue()
+    threading.Timer(0.05, fill, [events, [("a", 1), ("a", 0)]]).start()
+    start = time.monotonic()
+    assert events.drain(timeout=1)
+    assert time.monotonic() - start < 0.9
+    assert events.drain(timeout=0.01) == []
+
+
+def test_button_events_of_a_simulated_joycon():
+    sim = SimulatedJoyCon(buttons=lambda t: 0x08 if 0.05 < t < 0.1 else 0)
+    joycon = ButtonEventJoyCon(*sim.device_id, transport=sim)
+    try:
+        press = joycon.get_event(timeout=1)
+        release = joycon.get_event(timeout=1)
+        assert (press, release) == (("a", 1), ("a", 0))
+        assert press.seq < release.seq
+        assert press.timestamp < release.timestamp
+    finally:
+        joycon._close()
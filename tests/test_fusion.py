@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from pyjoycon.fusion import _MIN_VECTOR_BATCH, madgwick_batch, madgwick_update
+
+DT = 0.005
+
+
+def live(samples, q=(1, 0, 0, 0)):
+    # the orientation after each sample, fed one at a time like FusionTrackingJoyCon
+    out = []
+    for sample in np.reshape(samples, (-1, 6)):
+        q = madgwick_update(q, sample, DT)
+        out.append(q)
+    return np.reshape(out, np.shape(samples)[:-1] + (4,))
+
+
+def random_samples(shape, seed=0):
+    samples = np.random.default_rng(seed).normal(size=shape + (6,))
+    samples[..., 2] += 1  # gravity
+    return samples
+
+
+@pytest.mark.parametrize("shape", [(3,), (1, 3), (20, 3)])
+def test_batch_matches_live_filter(shape):
+    samples = random_samples(shape)
+    np.testing.assert_allclose(madgwick_batch(samples, DT), live(samples), atol=1e-12)
+
+
+def test_batch_of_sessions_matches_live_filter():
+    samples = random_samples((_MIN_VECTOR_BATCH + 1, 5, 3))
+    batch = madgwick_batch(samples, DT)
+    assert batch.shape == samples.shape[:-1] + (4,)
+    for session, result in zip(samples, batch):
+        np.testing.assert_allclose(result, live(session), atol=1e-12)
+
+
+@pytest.mark.parametrize("shape", [(0, 3), (2, 0, 3), (0, 4, 3)])
+def test_batch_of_nothing_is_empty(shape):
+    assert madgwick_batch(np.empty(shape + (6,)), DT).shape == shape + (4,)
+
+
+def test_batch_rejects_other_shapes():
+    with pytest.raises(ValueError):
+        madgwick_batch(np.zeros((4, 6)), DT)
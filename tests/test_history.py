@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from pyjoycon import JoyCon, SimulatedJoyCon
+from pyjoycon.history import ReportRingBuffer
+
+
+def report(i):
+    return bytes([i & 0xFF]) * 4
+
+
+def test_reports_since_wraps_around():
+    history = ReportRingBuffer(4, 4)
+    for i in range(10):
+        history.append(report(i), float(i))
+    assert len(history) == 4
+    out = history.reports_since(0)
+    assert [seq for seq, _, _ in out] == [6, 7, 8, 9]
+    assert [bytes(r) for _, _, r in out] == [report(i) for i in range(6, 10)]
+    assert [t for _, t, _ in out] == [6.0, 7.0, 8.0, 9.0]
+    assert history.reports_since(8)[0][0] == 8
+    assert history.reports_since(10) == []
+    with pytest.raises(IndexError):
+        history.get(5)
+
+
+def test_next_append_leaves_returned_reports_alone():
+    history = ReportRingBuffer(4, 4)
+    for i in range(6):
+        history.append(report(i), float(i))
+    out = history.reports_since(0)
+    history.append(report(6), 6.0)  # into the slot no report was handed out of
+    assert [bytes(r) for _, _, r in out] == [report(i) for i in range(2, 6)]
+
+
+def test_cursors_count_their_own_losses():
+    history = ReportRingBuffer(4, 4)
+    fast, slow = history.cursor(), history.cursor()
+    for i in range(3):
+        history.append(report(i), float(i))
+    assert [seq for seq, _, _ in fast.read()] == [0, 1, 2]
+    for i in range(3, 10):
+        history.append(report(i), float(i))
+    assert [seq for seq, _, _ in fast.read()] == [6, 7, 8, 9]
+    assert fast.lost == 3
+    assert [seq for seq, _, _ in slow.read()] == [6, 7, 8, 9]
+    assert slow.lost == 6
+    assert fast.read() == [] and fast.lost == 3
+
+
+def test_joycon_history_while_streaming():
+    sim = SimulatedJoyCon(period=0.002)
+    joycon = JoyCon(*sim.device_id, transport=sim, history=64)
+    try:
+        cursor = joycon.report_history.cursor(0)
+        seqs = []
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            for seq, timestamp, data in cursor.read():
+                assert data[0] == 0x30
+                seqs.append(seq)
+            time.sleep(0.01)
+        assert len(seqs) > 20
+        assert len(seqs) + cursor.lost == seqs[-1] + 1
+        assert seqs == sorted(set(seqs))
+    finally:
+        joycon._close()
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from pyjoycon.hooks import _get_trailing_timer, filter_hook
+
+
+class FakeJoyCon:
+    _INPUT_REPORT_PERIOD = 0.015
+
+    def __init__(self):
+        self._input_hooks = []
+        self._input_report = bytes(49)
+        self._report_time = 0.0
+
+    def report(self, hook):
+        self._report_time = time.monotonic()
+        hook(self)
+
+
+def rate_limited(joycon, callback):
+    hook = filter_hook(callback, max_rate=10)
+    joycon._input_hooks.append(hook)
+    joycon.report(hook)  # delivered right away
+    joycon.report(hook)  # too soon, left to the timer
+    return hook
+
+
+def test_max_rate_delivers_trailing_report():
+    calls = []
+    joycon = FakeJoyCon()
+    rate_limited(joycon, calls.append)
+    assert len(calls) == 1
+    time.sleep(0.2)
+    assert len(calls) == 2
+
+
+def test_raising_trailing_call_keeps_timer(caplog):
+    def fail(joycon):
+        if threading.current_thread() is _get_trailing_timer().thread:
+            raise RuntimeError("broken hook")
+
+    rate_limited(FakeJoyCon(), fail)
+    time.sleep(0.2)
+    assert _get_trailing_timer().thread.is_alive()
+    assert "trailing call" in caplog.text
+
+    calls = []
+    rate_limited(FakeJoyCon(), calls.append)
+    time.sleep(0.2)
+    assert len(calls) == 2
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from pyjoycon.output import OutputWriter
+
+
+class Device:
+    def __init__(self, fail=None, block=None):
+        self.written = []
+        self.fail = fail
+        self.block = block
+
+    def write(self, data):
+        if self.block is not None:
+            self.block.wait()
+        if self.fail is not None:
+            raise self.fail
+        self.written.append(bytes(data))
+
+
+def test_reports_are_numbered_and_paced():
+    device = Device()
+    writer = OutputWriter(device.write, 0.01, bytes(8))
+    futures = [writer.submit(0x01, 0x30, bytes([i])) for i in range(5)]
+    start = time.monotonic()
+    for future in futures:
+        future.result(1)
+    assert time.monotonic() - start >= 0.035
+    assert [r[1] for r in device.written] == [0, 1, 2, 3, 4]
+    assert [r[11] for r in device.written] == [0, 1, 2, 3, 4]
+    writer.close()
+
+
+def test_keyed_reports_coalesce():
+    device = Device()
+    writer = OutputWriter(device.write, 0.05, bytes(8))
+    first = writer.submit(0x01, 0x48, b"\x00")
+    futures = {writer.submit(0x01, 0x30, bytes([i]), key="lamp") for i in range(50)}
+    assert len(futures) == 1
+    first.result(1)
+    futures.pop().result(1)
+    assert len(device.written) == 2
+    assert device.written[1][11] == 49  # the latest argument
+    assert writer.coalesced == 49
+    writer.close()
+
+
+def test_unexpected_write_error_fails_only_that_report():
+    broken = OutputWriter(Device(fail=RuntimeError("backend bug")).write, 0.0, bytes(8))
+    device = Device()
+    working = OutputWriter(device.write, 0.0, bytes(8))
+    with pytest.raises(RuntimeError):
+        broken.submit(0x10).result(1)
+    broken.submit(0x10, future=False)
+    working.submit(0x10).result(1)
+    assert len(device.written) == 1
+    broken.close()
+    working.close()
+
+
+def test_close_gives_up_on_a_stuck_device():
+    release = threading.Event()
+    writer = OutputWriter(Device(block=release).write, 0.0, bytes(8))
+    writing = writer.submit(0x10)
+    queued = writer.submit(0x10)
+    start = time.monotonic()
+    writer.close(timeout=0.1)
+    assert time.monotonic() - start < 1
+    assert queued.cancelled()
+    release.set()
+    writing.result(1)
+    with pytest.raises(IOError):
+        writer.submit(0x10)
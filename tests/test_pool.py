@@ -0,0 +1,39 @@
+import time
+
+from pyjoycon import JoyCon, JoyConPool, SimulatedJoyCon
+
+
+def test_raising_hook_keeps_pool_running(caplog):
+    pool = JoyConPool()
+    try:
+        bad_sim, good_sim = SimulatedJoyCon(serial="BAD"), SimulatedJoyCon(serial="GOOD")
+        bad = pool.open(*bad_sim.device_id, transport=bad_sim)
+        good = pool.open(*good_sim.device_id, transport=good_sim)
+
+        def fail(joycon):
+            raise RuntimeError("broken hook")
+        bad.register_update_hook(fail)
+        seqs = bad._report_seq, good._report_seq
+        time.sleep(0.2)
+
+        assert all(r.thread.is_alive() for r in pool._readers)
+        assert good._report_seq > seqs[1] + 5
+        assert bad._report_seq > seqs[0] + 5  # still read, only its hook fails
+        assert "BAD" in caplog.text
+    finally:
+        pool.close()
+        for joycon in pool.joycons:
+            joycon._close()
+
+
+def test_pool_reads_every_device():
+    pool = JoyConPool()
+    try:
+        sims = [SimulatedJoyCon(serial=f"SIM{i}") for i in range(3)]
+        joycons = [pool.open(*sim.device_id, cls=JoyCon, transport=sim) for sim in sims]
+        time.sleep(0.2)
+        assert all(joycon._report_seq > 5 for joycon in joycons)
+    finally:
+        pool.close()
+        for joycon in pool.joycons:
+            joycon._close()
@@ -0,0 +1,101 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from pyjoycon import JoyCon, SimulatedJoyCon
+from pyjoycon.shm import SharedStatePublisher, SharedStateReader
+
+
+class Quaternion:
+    def __init__(self, w):
+        self.w, self.x, self.y, self.z = w, 0.0, 0.0, 0.0
+
+
+class FakeJoyCon:
+    # every field of report `i` holds `i`, so a torn read is easy to tell
+    def __init__(self, i):
+        self._report_state = (bytes([i & 0xFF]) * 49, i, float(i))
+        self.direction_Q = Quaternion(float(i))
+        self._calibration = (float(i),) * 12
+
+    def _get_imu_calibration(self):
+        return self._calibration
+
+
+@pytest.fixture
+def fast_switching():
+    # let the threads interleave within the writes of one report
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_reads_are_consistent_while_writing(fast_switching):
+    publisher = SharedStatePublisher()
+    reader = SharedStateReader(publisher.name)
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            publisher.publish(FakeJoyCon(i))
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        deadline = time.monotonic() + 0.5
+        reads = 0
+        while time.monotonic() < deadline:
+            state, orientation = reader.read()
+            i = state.seq
+            if i < 0:
+                continue
+            assert state.timestamp == i
+            assert state.report == bytes([i & 0xFF]) * 49
+            assert state._calibration == (float(i),) * 12
+            assert orientation == (float(i), 0.0, 0.0, 0.0)
+            reads += 1
+        assert reads
+    finally:
+        stop.set()
+        writer.join()
+        reader.close()
+        publisher.close()
+
+
+def test_close_while_publishing(fast_switching):
+    publisher = SharedStatePublisher()
+    errors = []
+
+    def write():
+        try:
+            for i in range(20000):
+                publisher.publish(FakeJoyCon(i))
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    time.sleep(0.01)
+    publisher.close()
+    writer.join()
+    assert not errors
+
+
+def test_joycon_publishes_its_reports():
+    sim = SimulatedJoyCon(buttons=0x08)
+    joycon = JoyCon(*sim.device_id, transport=sim, shared_memory=True)
+    reader = SharedStateReader(joycon.shared_memory.name)
+    try:
+        time.sleep(0.1)
+        shared = reader.read()
+        assert shared.state.seq > 0
+        assert shared.state.buttons == 0x08
+        assert shared.orientation is None
+    finally:
+        reader.close()
+        joycon._close()
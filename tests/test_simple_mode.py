@@ -0,0 +1,25 @@
+import pytest
+
+from pyjoycon import SimulatedJoyCon
+from pyjoycon.constants import HAT_DIRECTIONS
+
+
+# (raw stick, hat) with the joycon held sideways, 0 is up and clockwise from there
+@pytest.mark.parametrize("stick, hat", [
+    ((2048, 4000), 0),
+    ((4000, 2048), 2),
+    ((2048, 100), 4),
+    ((100, 2048), 6),
+    ((100, 4000), 7),
+    ((2048, 2048), 8),
+])
+def test_stick_hat(stick, hat):
+    sim = SimulatedJoyCon(stick_r=stick)
+    sim._start = 0.0
+    assert sim._make_simple_report(0.0)[3] == hat
+
+
+def test_hat_directions():
+    assert HAT_DIRECTIONS[0] == (0, 1)
+    assert HAT_DIRECTIONS[2] == (1, 0)
+    assert HAT_DIRECTIONS[8] == (0, 0)
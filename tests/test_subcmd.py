@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from pyjoycon import JoyCon, SimulatedJoyCon
+
+
+@pytest.fixture
+def joycon():
+    sim = SimulatedJoyCon(serial="SIM")
+    joycon = JoyCon(*sim.device_id, transport=sim, stats=True)
+    joycon._SUBCMD_TIMEOUT = 0.05
+    yield joycon
+    joycon._close()
+
+
+def test_timeout_stops_waiting_and_late_reply_is_discarded(joycon):
+    joycon._joycon_device.reply_delay = 0.2
+    with pytest.raises(IOError):
+        joycon._send_subcmd_get_response(b'\x30', b'\x01')
+    assert not joycon._pending_subcmds
+
+    time.sleep(0.3)  # the late reply comes in with nobody waiting
+    assert joycon.stats.discarded[0x21] == 1
+    joycon._joycon_device.reply_delay = 0.0
+    ack, data = joycon._send_subcmd_get_response(b'\x30', b'\x02')
+    assert ack and data[1] == 0x30
+    assert not joycon._pending_subcmds
+
+
+def test_spi_read_timeout_cancels_subcommand(joycon):
+    joycon._joycon_device.reply_delay = 0.2
+    with pytest.raises(IOError):
+        joycon._spi_flash_read(0x6050, 6)
+    assert not joycon._pending_subcmds
+    time.sleep(0.3)
+    assert joycon.stats.discarded[0x21] == 1
+
+
+def test_concurrent_spi_reads_get_their_own_reply(joycon):
+    sim = joycon._joycon_device
+    sim.reply_delay = 0.02
+    joycon._SUBCMD_TIMEOUT = 1.0
+    reads = [(0x6050, 6), (0x6020, 0x18), (0x6050, 3)]
+    futures = [joycon._spi_flash_read_future(address, size) for address, size in reads]
+    for (address, size), future in zip(reads, futures):
+        assert future.result(1) == bytes(sim.flash[address:address + size])
+    assert not joycon._pending_subcmds
+    assert joycon.stats.discarded[0x21] == 0
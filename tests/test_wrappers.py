@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from pyjoycon import PythonicJoyCon, SimulatedJoyCon
+from pyjoycon.constants import JOYCON_L_PRODUCT_ID, JOYCON_R_PRODUCT_ID
+
+
+class RecordingJoyCon(PythonicJoyCon):
+    # records the axis coefficient the first report is handled with
+    def _handle_input_report(self, report, timestamp):
+        if not hasattr(self, "first_coeff"):
+            self.first_coeff = self._ime_yz_coeff
+        super()._handle_input_report(report, timestamp)
+
+
+@pytest.mark.parametrize("product_id, invert, coeff", [
+    (JOYCON_L_PRODUCT_ID, True, -1),
+    (JOYCON_L_PRODUCT_ID, False, 1),
+    (JOYCON_R_PRODUCT_ID, True, 1),
+])
+def test_left_axis_inversion_from_the_first_report(product_id, invert, coeff):
+    sim = SimulatedJoyCon(product_id=product_id, imu=(0, 0x1000, 0x1000, 0, 0, 0))
+    joycon = RecordingJoyCon(*sim.device_id, transport=sim, invert_left_ime_yz=invert)
+    try:
+        time.sleep(0.1)
+        assert joycon.first_coeff == coeff
+        _, y, z = joycon.accel_in_g[0]
+        assert y * coeff > 0 and z * coeff > 0
+    finally:
+        joycon._close()